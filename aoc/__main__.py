@@ -0,0 +1,145 @@
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from aoc import bench, cache, engines, generators, memo, runner
+from aoc.days import parse_days
+from aoc.log import add_log_arguments, configure_logging
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.stats import add_stats_arguments
+
+
+def main(argv: list[str] | None = None):
+    parser = ArgumentParser(prog="python -m aoc")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Time parse, part 1 and part 2 of several days")
+    run_parser.add_argument("--days", type=str, default="1-9", help="e.g. 1-9 or 1,3,5-7")
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--input-name", type=str, default="input.txt", help="Input file in each day_XX folder")
+    run_parser.add_argument("--input-dir", type=str, help="Folder of day_XX.txt inputs instead")
+    run_parser.add_argument("--json", type=str, help="Write the report as JSON to this file, - for stdout")
+    run_parser.add_argument("-v", "--verbose", action="store_true", help="Keep the solvers output")
+    run_parser.add_argument("--no-cache", action="store_true", help="Always parse the inputs")
+    run_parser.add_argument("--cache-dir", type=str, default=str(cache.CACHE_DIR))
+    run_parser.add_argument("--cache-size-mb", type=int, default=cache.DEFAULT_MAX_BYTES >> 20)
+    add_profile_arguments(run_parser)
+    add_log_arguments(run_parser, default=None)
+    add_stats_arguments(run_parser)
+    run_parser.add_argument("-j", "--jobs", type=int, help="Run each day in its own process, 0 means one per CPU")
+    run_parser.add_argument("--timeout", type=float, help="Seconds allowed per day, with --jobs")
+    run_parser.add_argument("--memo", action="store_true", help="Reuse the answers of inputs already solved")
+    run_parser.add_argument("--memo-db", type=str, default=str(memo.MEMO_DB))
+    run_parser.add_argument(
+        "--engine", choices=("default", "auto"), default="default", help="auto picks the engine calibrated fastest"
+    )
+    run_parser.add_argument("--calibration", type=str, default=str(engines.CALIBRATION))
+
+    calibrate_parser = commands.add_parser("calibrate", help="Time each day's engines on generated inputs")
+    calibrate_parser.add_argument("--days", type=str, default="1-9", help="e.g. 1-9 or 1,3,5-7")
+    calibrate_parser.add_argument("--seed", type=int, default=0)
+    calibrate_parser.add_argument("--repeat", type=int, default=1)
+    calibrate_parser.add_argument("--calibration", type=str, default=str(engines.CALIBRATION))
+    calibrate_parser.add_argument("--force", action="store_true", help="Time again the days already calibrated")
+    add_log_arguments(calibrate_parser)
+
+    generate_parser = commands.add_parser("generate", help="Write scaled synthetic inputs as day_XX.txt")
+    generate_parser.add_argument("--days", type=str, default="1-9", help="e.g. 1-9 or 1,3,5-7")
+    generate_parser.add_argument("--scale", type=int, default=1, help="Size factor against the puzzle input")
+    generate_parser.add_argument("--seed", type=int, default=0)
+    generate_parser.add_argument("--output-dir", type=str, required=True)
+
+    bench_parser = commands.add_parser("bench", help="Time every phase over growing generated inputs")
+    bench_parser.add_argument("--days", type=str, default="1-9", help="e.g. 1-9 or 1,3,5-7")
+    bench_parser.add_argument("--scales", type=str, default="1,2,4,8", help="Input size factors")
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    bench_parser.add_argument("--baseline", type=str, default=str(bench.BASELINE))
+    bench_parser.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    bench_parser.add_argument("--max-increase", type=float, default=20.0, help="Allowed slow down in %%")
+    bench_parser.add_argument("--min-time-ms", type=float, default=1.0, help="Ignore phases faster than this")
+
+    args = parser.parse_args(argv)
+    match args.command:
+        case "run":
+            # the solvers log on stderr, warnings only unless asked for
+            log_level = args.log_level or ("info" if args.verbose else "warning")
+            configure_logging(log_level)
+            profiler = Profiler.from_args(args)
+            options = dict(
+                repeat=args.repeat,
+                input_name=args.input_name,
+                input_dir=args.input_dir,
+                verbose=args.verbose,
+                cache=None
+                if args.no_cache
+                else cache.ParseCache(directory=Path(args.cache_dir), max_bytes=args.cache_size_mb << 20),
+                stats=args.stats,
+                memo=memo.ResultStore(path=Path(args.memo_db)) if args.memo else None,
+                # calibrates the days missing on first use
+                selector=engines.Selector(
+                    calibration=engines.calibrate(parse_days(args.days), filename=args.calibration)
+                )
+                if args.engine == "auto"
+                else None,
+            )
+            if args.jobs is None:
+                if args.timeout is not None:
+                    run_parser.error("--timeout needs --jobs")
+                reports = runner.run(parse_days(args.days), profiler=profiler, **options)
+            else:
+                if args.profile:
+                    run_parser.error("--profile needs the sequential runner, without --jobs")
+                reports = runner.run_parallel(
+                    parse_days(args.days),
+                    max_workers=args.jobs or None,
+                    timeout=args.timeout,
+                    log_level=log_level,
+                    **options,
+                )
+            profiler.report()
+            if args.json != "-":
+                runner.print_reports(reports)
+                runner.print_report_counters(reports)
+            if args.json:
+                runner.write_json(runner.to_json(reports, repeat=args.repeat), args.json)
+        case "calibrate":
+            configure_logging(args.log_level)
+            calibration = engines.calibrate(
+                parse_days(args.days), filename=args.calibration, force=args.force, seed=args.seed, repeat=args.repeat
+            )
+            for day, known in calibration["days"].items():
+                print(
+                    f"Day {day}: "
+                    + ", ".join((f"{point['engine']} at size {point['size']}" for point in known["points"]))
+                )
+        case "generate":
+            generators.generate_all(parse_days(args.days), args.output_dir, scale=args.scale, seed=args.seed)
+        case "bench":
+            results = bench.run_benchmark(
+                parse_days(args.days),
+                [int(scale) for scale in args.scales.split(",")],
+                seed=args.seed,
+                repeat=args.repeat,
+            )
+            bench.print_results(results)
+            if args.save:
+                bench.save_baseline(results, args.baseline)
+                return
+            if (baseline := bench.load_baseline(args.baseline)) is None:
+                sys.exit(
+                    f"No baseline of {results['machine']} in {args.baseline}, timings of other machines do not compare:"
+                    " run with --save to record one"
+                )
+            if regressions := bench.compare(
+                baseline, results, max_increase_pct=args.max_increase, min_time_ms=args.min_time_ms
+            ):
+                print(f"{len(regressions)} regressions against {args.baseline}:")
+                for regression in regressions:
+                    print(f"  -> {regression}")
+                sys.exit(1)
+            print(f"No regression against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
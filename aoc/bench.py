@@ -0,0 +1,147 @@
+import dataclasses
+import json
+import math
+import tempfile
+from pathlib import Path
+
+from aoc.days import DAYS, ROOT
+from aoc.engines import machine
+from aoc.generators import generate
+from aoc.runner import PHASES, run_day
+
+# one baseline per machine, timings only compare on the machine that recorded them
+BASELINE = ROOT / "benchmarks" / "baseline.json"
+# part 2 of days 6 and 7 is brute force, minutes at x1: their inputs are this fraction of each scale
+SCALE_FACTORS = {6: 1 / 64, 7: 1 / 64}
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Point:
+    scale: int
+    size: int
+    min_ns: int
+
+
+def fit_exponent(points: list[Point]) -> float | None:
+    """k in time ~ size ** k, least squares on log-log; None without 2 distinct sizes"""
+    xs = [math.log(point.size) for point in points if point.min_ns > 0]
+    ys = [math.log(point.min_ns) for point in points if point.min_ns > 0]
+    if len(set(xs)) < 2:
+        return None
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    covariance = sum(((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)))
+    variance = sum(((x - x_mean) ** 2 for x in xs))
+    return covariance / variance
+
+
+def run_benchmark(days: list[int], scales: list[int], *, seed: int = 0, repeat: int = 3) -> dict:
+    """Time every phase of each day on generated inputs of growing scale, days 6 and 7 scaled down"""
+    results = {}
+    with tempfile.TemporaryDirectory() as input_dir:
+        for day_number in days:
+            points = {phase: [] for phase in PHASES}
+            for scale in scales:
+                filename = Path(input_dir) / f"day_{day_number:02d}_x{scale}.txt"
+                generate(day_number, filename, scale=scale * SCALE_FACTORS.get(day_number, 1), seed=seed)
+                report = run_day(DAYS[day_number], filename, repeat=repeat)
+                print(
+                    f"  -> day {day_number} x{scale}: "
+                    + " ".join((f"{p}={t.min_ns / 1e6:.3f}ms" for p, t in report.phases.items()))
+                )
+                for phase, timing in report.phases.items():
+                    points[phase].append(Point(scale=scale, size=filename.stat().st_size, min_ns=timing.min_ns))
+                filename.unlink()
+
+            results[str(day_number)] = {
+                phase: {
+                    "exponent": fit_exponent(phase_points),
+                    "points": [dataclasses.asdict(point) for point in phase_points],
+                }
+                for phase, phase_points in points.items()
+            }
+    return {"machine": machine(), "seed": seed, "repeat": repeat, "scales": scales, "days": results}
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Regression:
+    day: str
+    phase: str
+    scale: int
+    baseline_ns: int
+    current_ns: int
+
+    def __repr__(self):
+        return (
+            f"day {self.day} {self.phase} x{self.scale}: {self.baseline_ns / 1e6:.3f}ms -> {self.current_ns / 1e6:.3f}ms"
+            f" (+{(self.current_ns / self.baseline_ns - 1) * 100:.0f}%)"
+        )
+
+
+def compare(
+    baseline: dict, current: dict, *, max_increase_pct: float = 20.0, min_time_ms: float = 1.0
+) -> list[Regression]:
+    """Phases slower than the baseline by more than max_increase_pct, ignoring ones faster than min_time_ms.
+
+    Both must come from the same machine.
+    """
+    if baseline.get("machine") != current.get("machine"):
+        raise ValueError(f"Baseline of {baseline.get('machine')} cannot time {current.get('machine')}")
+    regressions = []
+    for day, phases in current["days"].items():
+        for phase, result in phases.items():
+            previous = {
+                point["scale"]: point for point in baseline["days"].get(day, {}).get(phase, {}).get("points", [])
+            }
+            for point in result["points"]:
+                if (before := previous.get(point["scale"])) is None:
+                    continue
+                if max(point["min_ns"], before["min_ns"]) < min_time_ms * 1e6:
+                    continue
+                if point["min_ns"] > before["min_ns"] * (1 + max_increase_pct / 100):
+                    regressions.append(
+                        Regression(
+                            day=day,
+                            phase=phase,
+                            scale=point["scale"],
+                            baseline_ns=before["min_ns"],
+                            current_ns=point["min_ns"],
+                        )
+                    )
+    return regressions
+
+
+def print_results(results: dict):
+    print(
+        f"{'day':>3} {'phase':<7} {'exponent':>8}  "
+        + " ".join((f"{'x' + str(scale) + ' ms':>10}" for scale in results["scales"]))
+    )
+    for day, phases in results["days"].items():
+        for phase, result in phases.items():
+            exponent = "-" if result["exponent"] is None else f"{result['exponent']:.2f}"
+            times = " ".join((f"{point['min_ns'] / 1e6:10.3f}" for point in result["points"]))
+            print(f"{day:>3} {phase:<7} {exponent:>8}  {times}")
+
+
+def load_baselines(filename: Path | str = BASELINE) -> dict[str, dict]:
+    """Baseline of each machine, by engines.machine()"""
+    try:
+        with open(filename, "r") as fin:
+            return json.load(fin)["machines"]
+    except FileNotFoundError:
+        return {}
+
+
+def load_baseline(filename: Path | str = BASELINE) -> dict | None:
+    """Baseline of this machine, None if it has none"""
+    return load_baselines(filename).get(machine())
+
+
+def save_baseline(results: dict, filename: Path | str = BASELINE):
+    """Replaces the baseline of the machine of results, keeping the other machines'"""
+    baselines = load_baselines(filename)
+    baselines[results["machine"]] = results
+    filename = Path(filename)
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    filename.write_text(json.dumps({"machines": dict(sorted(baselines.items()))}, indent=2) + "\n")
+    print(f"Wrote baseline of {results['machine']} to {filename}")
@@ -0,0 +1,161 @@
+import contextlib
+import dataclasses
+import functools
+import hashlib
+import importlib
+import inspect
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+from aoc.days import ROOT, Day
+from aoc.log import get_logger
+
+logger = get_logger("cache")
+
+CACHE_DIR = ROOT / ".cache" / "parsed"
+DEFAULT_MAX_BYTES = 256 << 20
+
+# magic, pickle size, number of out-of-band buffers, then one size per buffer
+_MAGIC = b"AOCP"
+_HEADER = struct.Struct("<4sQI")
+_BUFFER_SIZE = struct.Struct("<Q")
+_SUFFIX = ".pkl"
+
+
+def content_hash(filename: Path | str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as fin:
+        while chunk := fin.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.cache
+def source_hash(module: str) -> str:
+    """Hash of a parser module's source and of the aoc modules defining the classes it uses"""
+    obj = importlib.import_module(module)
+    modules = {obj.__name__} | {
+        value.__module__
+        for value in vars(obj).values()
+        if inspect.isclass(value) and value.__module__.split(".")[0] == "aoc"
+    }
+    digest = hashlib.sha256()
+    for name in sorted(modules):
+        digest.update(Path(inspect.getfile(importlib.import_module(name))).read_bytes())
+    return digest.hexdigest()
+
+
+def dump(data: Any, filename: Path | str):
+    """Pickle protocol 5, buffers such as bytearray cells are written raw after the pickle"""
+    buffers = []
+    payload = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+    filename = Path(filename)
+    # write then rename so that a reader never sees half an entry
+    with tempfile.NamedTemporaryFile("wb", dir=filename.parent, suffix=".tmp", delete=False) as fout:
+        fout.write(_HEADER.pack(_MAGIC, len(payload), len(raws)))
+        for raw in raws:
+            fout.write(_BUFFER_SIZE.pack(raw.nbytes))
+        fout.write(payload)
+        for raw in raws:
+            fout.write(raw)
+    os.replace(fout.name, filename)
+
+
+def load(filename: Path | str) -> Any:
+    """Maps the file and unpickles straight from it"""
+    with open(filename, "rb") as fin:
+        mapped = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        with memoryview(mapped) as view:
+            magic, payload_size, count = _HEADER.unpack_from(view)
+            if magic != _MAGIC:
+                raise ValueError(f"{filename} is not a parse cache entry")
+            offset = _HEADER.size
+            sizes = []
+            for _ in range(count):
+                sizes.append(_BUFFER_SIZE.unpack_from(view, offset)[0])
+                offset += _BUFFER_SIZE.size
+            payload = view[offset : offset + payload_size]
+            offset += payload_size
+            buffers = []
+            for size in sizes:
+                buffers.append(view[offset : offset + size])
+                offset += size
+            try:
+                return pickle.loads(payload, buffers=buffers)
+            finally:
+                for buffer in (payload, *buffers):
+                    buffer.release()
+    finally:
+        # an object keeping a view on the file keeps the map open until it is collected
+        with contextlib.suppress(BufferError):
+            mapped.close()
+
+
+@dataclasses.dataclass(kw_only=True)
+class ParseCache:
+    """Parsed inputs on disk, keyed by input content, parser version and parser source, least recently used evicted
+    first"""
+
+    directory: Path = CACHE_DIR
+    max_bytes: int = DEFAULT_MAX_BYTES
+    hits: int = 0
+    misses: int = 0
+
+    def key(self, day: Day, filename: Path | str) -> str:
+        # the source catches the pickled classes changing without a parse_version bump
+        parser = f"{day.module}.{day.parse}:{day.parse_version}:{source_hash(day.module)}"
+        digest = hashlib.sha256(f"{content_hash(filename)}:{parser}".encode()).hexdigest()
+        return f"day_{day.day:02d}-{digest}"
+
+    def path(self, key: str) -> Path:
+        return Path(self.directory) / f"{key}{_SUFFIX}"
+
+    def parse(self, day: Day, parse: Callable[[Path | str], Any], filename: Path | str) -> Any:
+        """Cached result of parse(filename), parsed and stored on a miss"""
+        path = self.path(self.key(day, filename))
+        try:
+            data = load(path)
+        except Exception:
+            # missing, truncated, or pickled from classes that changed since
+            if path.exists():
+                logger.debug("Cannot load %s, parsing again", path, exc_info=True)
+            self.misses += 1
+            data = parse(filename)
+            Path(self.directory).mkdir(parents=True, exist_ok=True)
+            dump(data, path)
+            self.evict()
+            return data
+        self.hits += 1
+        # the modification time orders entries for eviction
+        path.touch()
+        return data
+
+    def entries(self) -> list[Path]:
+        """Oldest used first"""
+        if not Path(self.directory).is_dir():
+            return []
+        return sorted(Path(self.directory).glob(f"*{_SUFFIX}"), key=lambda path: path.stat().st_mtime_ns)
+
+    def evict(self) -> int:
+        """Removes the least recently used entries above max_bytes, returns how many"""
+        entries = self.entries()
+        total = sum((entry.stat().st_size for entry in entries))
+        removed = 0
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            entry.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def clear(self):
+        for entry in self.entries():
+            entry.unlink(missing_ok=True)
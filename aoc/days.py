@@ -0,0 +1,109 @@
+import dataclasses
+import importlib
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).parent.parent.absolute()
+
+
+def resolve(module: str, path: str) -> Callable:
+    """`Data.from_file` in module, imported on first use"""
+    obj = importlib.import_module(module)
+    for attr in path.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Day:
+    """Where to find a day's parser and solvers, imported only when needed"""
+
+    day: int
+    module: str
+    parse: str
+    part_1: str
+    part_2: str
+    # bump when the parsed structure changes, invalidates the parse cache along with any change to the module source
+    parse_version: int = 1
+    # bump when an answer can change, invalidates the memoized results
+    solver_version: int = 1
+    # keyword arguments each part is called with, also keys its memoized results
+    part_1_params: dict[str, Any] = dataclasses.field(default_factory=dict)
+    part_2_params: dict[str, Any] = dataclasses.field(default_factory=dict)
+
+    @property
+    def directory(self) -> Path:
+        return ROOT / f"day_{self.day:02d}"
+
+    def input_file(self, name: str = "input.txt") -> Path:
+        return self.directory / name
+
+    def load(self) -> "Solver":
+        return Solver(
+            day=self,
+            parse=resolve(self.module, self.parse),
+            part_1=resolve(self.module, self.part_1),
+            part_2=resolve(self.module, self.part_2),
+        )
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Solver:
+    day: Day
+    parse: Callable[[Path | str], Any]
+    part_1: Callable[[Any], Any]
+    part_2: Callable[[Any], Any]
+
+
+DAYS: dict[int, Day] = {
+    day.day: day
+    for day in (
+        Day(day=1, module="day_01.compute", parse="ListData.from_file", part_1="q1_distance", part_2="q2_similarity"),
+        Day(day=2, module="day_02.compute", parse="Report.from_file", part_1="q1_count_safe", part_2="q2_remove_safe"),
+        Day(day=3, module="day_03.compute", parse="Mult.from_file", part_1="q1_lazy_mult", part_2="q2_active_mult"),
+        Day(day=4, module="day_04.compute", parse="Card.from_file", part_1="q1_find_xmas", part_2="q2_find_x_mas"),
+        Day(
+            day=5,
+            module="day_05.compute",
+            parse="SetOfRules.from_file",
+            part_1="q1_middle_page",
+            part_2="q2_reordered_middle_page",
+        ),
+        Day(day=6, module="day_06.compute", parse="Map.from_file", part_1="q1_visited", part_2="q2_obstructions"),
+        Day(day=7, module="day_07.compute", parse="Equation.from_file", part_1="q1_brute", part_2="q2_brute"),
+        Day(
+            day=8,
+            module="day_08.compute",
+            parse="Data.from_file",
+            part_1="q1_antinodes",
+            part_2="q2_resonance",
+            parse_version=2,
+        ),
+        Day(
+            day=9,
+            module="day_09.compute",
+            parse="Disk.from_file",
+            part_1="q1_compress",
+            part_2="q2_defragment",
+            parse_version=2,
+        ),
+    )
+}
+
+
+def parse_days(spec: str) -> list[int]:
+    """`1-3,7` -> [1, 2, 3, 7]"""
+    days = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-")
+            days.extend(range(int(first), int(last) + 1))
+        else:
+            days.append(int(part))
+    for day in days:
+        if day not in DAYS:
+            raise ValueError(f"No solver for {day=}")
+    return sorted(set(days))
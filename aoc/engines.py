@@ -0,0 +1,210 @@
+import bisect
+import contextlib
+import dataclasses
+import io
+import json
+import math
+import platform
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from aoc.days import DAYS, ROOT, resolve
+from aoc.generators import generate
+from aoc.log import get_logger
+
+logger = get_logger("engines")
+
+CALIBRATION = ROOT / ".cache" / "engines.json"
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Engine:
+    """Alternative part functions taking the same parsed input as the day's own, or the input of their own parser"""
+
+    name: str
+    part_1: str
+    part_2: str
+    parse: str | None = None
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Dispatch:
+    day: int
+    # size of the parsed input, e.g. grid area or number of equations
+    size: str
+    engines: tuple[Engine, ...]
+    # generated inputs timed by calibrate, at least 2 so that the engine can change with the size
+    scales: tuple[float, ...] = (1, 4, 16)
+
+    @property
+    def module(self) -> str:
+        return DAYS[self.day].module
+
+    def input_size(self, data: Any) -> int:
+        return resolve(self.module, self.size)(data)
+
+    def parts(self, engine: Engine) -> dict[str, Callable[[Any], Any]]:
+        return {"part_1": resolve(self.module, engine.part_1), "part_2": resolve(self.module, engine.part_2)}
+
+    def parser(self, engine: Engine) -> Callable[[Path | str], Any]:
+        return resolve(self.module, engine.parse or DAYS[self.day].parse)
+
+    def engine(self, name: str) -> Engine:
+        return next((engine for engine in self.engines if engine.name == name))
+
+    def signature(self) -> str:
+        """Changes with the engines or the scales, so that their calibration is redone"""
+        engines = ",".join(
+            (f"{engine.name}={engine.parse or ''}:{engine.part_1}/{engine.part_2}" for engine in self.engines)
+        )
+        return f"{engines};scales={','.join(map(str, self.scales))}"
+
+
+# the brute force engines of day 7 are left out, minutes at scale 1; batch takes seconds from x1
+DISPATCH: dict[int, Dispatch] = {
+    dispatch.day: dispatch
+    for dispatch in (
+        Dispatch(
+            day=7,
+            size="input_size",
+            engines=(
+                Engine(name="prune", part_1="q1_prune", part_2="q2_prune"),
+                Engine(name="batch", part_1="q1_batch", part_2="q2_batch"),
+            ),
+            scales=(0.25, 1),
+        ),
+        Dispatch(
+            day=8,
+            size="input_size",
+            engines=(
+                Engine(name="map", part_1="q1_antinodes", part_2="q2_resonance"),
+                Engine(name="grid", part_1="q1_antinodes_grid", part_2="q2_resonance_grid"),
+                Engine(name="bitset", part_1="q1_antinodes_bitset", part_2="q2_resonance_bitset"),
+            ),
+        ),
+        Dispatch(
+            day=9,
+            size="input_size",
+            engines=(
+                Engine(name="disk", part_1="q1_compress", part_2="q2_defragment"),
+                Engine(
+                    name="compact",
+                    part_1="q1_compress_compact",
+                    part_2="q2_defragment_compact",
+                    parse="CompactDisk.from_file",
+                ),
+            ),
+            scales=(1, 4),
+        ),
+    )
+}
+
+
+def machine() -> str:
+    return f"{platform.node()}/{platform.machine()}/{platform.python_implementation()}-{platform.python_version()}"
+
+
+def _time_engine(
+    parse: Callable[[Path | str], Any], parts: dict[str, Callable], filename: Path | str, repeat: int
+) -> tuple[int, tuple]:
+    """Best time of the parse and both parts together, and their answers"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        data = parse(filename)
+        answers = tuple((func(data) for func in parts.values()))
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, answers
+
+
+def calibrate_day(dispatch: Dispatch, *, seed: int = 0, repeat: int = 1) -> dict:
+    """Times every engine, its parse included, on generated inputs of each scale, the fastest wins at that size"""
+    solver = DAYS[dispatch.day].load()
+    points = []
+    with tempfile.TemporaryDirectory() as input_dir:
+        for scale in dispatch.scales:
+            filename = Path(input_dir) / f"day_{dispatch.day:02d}_x{scale}.txt"
+            # the generator prints the file it writes
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate(dispatch.day, filename, scale=scale, seed=seed)
+            data = solver.parse(filename)
+            times = {}
+            answers = {}
+            for engine in dispatch.engines:
+                times[engine.name], answers[engine.name] = _time_engine(
+                    dispatch.parser(engine), dispatch.parts(engine), filename, repeat
+                )
+            if len(set(answers.values())) != 1:
+                raise RuntimeError(f"Day {dispatch.day} engines disagree at x{scale}: {answers}")
+            points.append({
+                "scale": scale,
+                "size": dispatch.input_size(data),
+                "engine": min(times, key=times.get),
+                "times_ns": times,
+            })
+            logger.info(
+                "Day %d x%s: %s fastest at size %d", dispatch.day, scale, points[-1]["engine"], points[-1]["size"]
+            )
+    return {"signature": dispatch.signature(), "points": points}
+
+
+def load_calibration(filename: Path | str = CALIBRATION) -> dict:
+    try:
+        with open(filename, "r") as fin:
+            calibration = json.load(fin)
+    except FileNotFoundError:
+        return {"machine": machine(), "days": {}}
+    if calibration.get("machine") != machine():
+        return {"machine": machine(), "days": {}}
+    return calibration
+
+
+def save_calibration(calibration: dict, filename: Path | str = CALIBRATION):
+    filename = Path(filename)
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    filename.write_text(json.dumps(calibration, indent=2) + "\n")
+
+
+def calibrate(
+    days: list[int], *, filename: Path | str = CALIBRATION, force: bool = False, seed: int = 0, repeat: int = 1
+) -> dict:
+    """Calibration of the dispatched days, only timing the ones missing or whose engines changed"""
+    calibration = load_calibration(filename)
+    changed = False
+    for day_number in days:
+        if (dispatch := DISPATCH.get(day_number)) is None:
+            continue
+        known = calibration["days"].get(str(day_number))
+        if force or known is None or known["signature"] != dispatch.signature():
+            calibration["days"][str(day_number)] = calibrate_day(dispatch, seed=seed, repeat=repeat)
+            changed = True
+    if changed:
+        save_calibration(calibration, filename)
+    return calibration
+
+
+def choose(points: list[dict], size: int) -> str:
+    """Engine of the calibrated size nearest to size, on a log scale"""
+    points = sorted(points, key=lambda point: point["size"])
+    # geometric means of consecutive sizes split the ranges
+    bounds = [math.sqrt(max(a["size"], 1) * max(b["size"], 1)) for a, b in zip(points, points[1:])]
+    return points[bisect.bisect_right(bounds, size)]["engine"]
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Selector:
+    """Picks each dispatched day's engine from the size of its parsed input"""
+
+    calibration: dict
+
+    def select(self, day_number: int, data: Any) -> tuple[Engine, dict[str, Callable[[Any], Any]]] | None:
+        dispatch = DISPATCH.get(day_number)
+        known = self.calibration["days"].get(str(day_number))
+        if dispatch is None or known is None or known["signature"] != dispatch.signature():
+            return None
+        name = choose(known["points"], dispatch.input_size(data))
+        engine = dispatch.engine(name)
+        return engine, dispatch.parts(engine)
@@ -0,0 +1,38 @@
+import random
+from pathlib import Path
+from typing import Callable
+
+from aoc.generators import day_01, day_02, day_03, day_04, day_05, day_06, day_07, day_08, day_09
+
+Generator = Callable[..., None]
+
+GENERATORS: dict[int, Generator] = {
+    1: day_01.generate,
+    2: day_02.generate,
+    3: day_03.generate,
+    4: day_04.generate,
+    5: day_05.generate,
+    6: day_06.generate,
+    7: day_07.generate,
+    8: day_08.generate,
+    9: day_09.generate,
+}
+
+
+def generate(day: int, filename: Path | str, *, scale: float = 1, seed: int = 0) -> Path:
+    """Write an input about `scale` times the size of the puzzle's, the same for the same seed.
+
+    Only days 6 and 7 take fractional scales.
+    """
+    filename = Path(filename)
+    print(f"Generating day {day} x{scale} ({seed=}) to {filename}")
+    with open(filename, "w", buffering=1 << 20) as fout:
+        GENERATORS[day](fout, scale=scale, rnd=random.Random(seed))
+    return filename
+
+
+def generate_all(days: list[int], output_dir: Path | str, *, scale: int = 1, seed: int = 0) -> list[Path]:
+    """One day_XX.txt per day, as read by `python -m aoc run --input-dir`"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return [generate(day, output_dir / f"day_{day:02d}.txt", scale=scale, seed=seed) for day in days]
@@ -0,0 +1,10 @@
+import random
+from typing import TextIO
+
+
+def generate(fout: TextIO, *, scale: int, rnd: random.Random):
+    """Two columns of 5 digit location ids, half of the right one reusing left ids"""
+    for _ in range(1000 * scale):
+        a = rnd.randint(10000, 99999)
+        b = a if rnd.random() < 0.5 else rnd.randint(10000, 99999)
+        fout.write(f"{a}   {b}\n")
@@ -0,0 +1,16 @@
+import random
+from typing import TextIO
+
+
+def generate(fout: TextIO, *, scale: int, rnd: random.Random):
+    """Reports of 5 to 8 levels moving by 1 to 3, some with one bad level"""
+    for _ in range(1000 * scale):
+        direction = rnd.choice((-1, 1))
+        level = rnd.randint(30, 70)
+        levels = [level]
+        for _ in range(rnd.randint(4, 7)):
+            level += direction * rnd.randint(1, 3)
+            levels.append(level)
+        if rnd.random() < 0.5:
+            levels[rnd.randrange(len(levels))] += rnd.choice((-4, 0, 4))
+        fout.write(" ".join(map(str, levels)) + "\n")
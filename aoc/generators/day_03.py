@@ -0,0 +1,21 @@
+import random
+from typing import TextIO
+
+_NOISE = ("where()", "what()", "how()", "select()", "from()", "why()", "when(1,2)", "mul[3,4]", "mul(4*", "@", "!", " ")
+
+
+def generate(fout: TextIO, *, scale: int, rnd: random.Random):
+    """Lines of corrupted memory with mul(a,b) instructions, do() and don't() between noise"""
+    for _ in range(6 * scale):
+        # never start with an instruction, from_file only finds them past offset 0
+        line = [rnd.choice(_NOISE)]
+        for _ in range(150):
+            match rnd.randrange(20):
+                case 0:
+                    line.append("do()")
+                case 1:
+                    line.append("don't()")
+                case _:
+                    line.append(f"mul({rnd.randint(1, 999)},{rnd.randint(1, 999)})")
+            line.append(rnd.choice(_NOISE))
+        fout.write("".join(line) + "\n")
@@ -0,0 +1,10 @@
+import math
+import random
+from typing import TextIO
+
+
+def generate(fout: TextIO, *, scale: int, rnd: random.Random):
+    """Square grid of X, M, A and S"""
+    side = round(140 * math.sqrt(scale))
+    for _ in range(side):
+        fout.write("".join(rnd.choices("XMAS", k=side)) + "\n")
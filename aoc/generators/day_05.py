@@ -0,0 +1,19 @@
+import random
+from typing import TextIO
+
+
+def generate(fout: TextIO, *, scale: int, rnd: random.Random):
+    """A rule for every pair of 49 pages, all from one hidden order so no update has a cycle, and odd updates"""
+    order = rnd.sample(range(10, 100), 49)
+    rules = [(first, second) for i, first in enumerate(order) for second in order[i + 1 :]]
+    rnd.shuffle(rules)
+    for first, second in rules:
+        fout.write(f"{first}|{second}\n")
+    fout.write("\n")
+
+    rank = {page: i for i, page in enumerate(order)}
+    for _ in range(200 * scale):
+        pages = rnd.sample(order, rnd.randrange(5, 24, 2))
+        if rnd.random() < 0.5:
+            pages.sort(key=rank.__getitem__)
+        fout.write(",".join(map(str, pages)) + "\n")
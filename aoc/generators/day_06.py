@@ -0,0 +1,54 @@
+import math
+import random
+from typing import TextIO
+
+# up, right, down, left
+_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+# random bytes below 13 are obstacles, ~5%
+_OBSTACLES = bytes(1 if byte < 13 else 0 for byte in range(256))
+_CELLS = bytes.maketrans(b"\x00\x01", b".#")
+
+
+def _patrol_length(obstacles: bytearray, side: int, x: int, y: int) -> int | None:
+    """Steps before the guard leaves the map, None if it loops"""
+    facing = 0
+    seen = set()
+    while True:
+        if (state := (y * side + x) * 4 + facing) in seen:
+            return None
+        seen.add(state)
+        dx, dy = _STEPS[facing]
+        nx, ny = x + dx, y + dy
+        if not (0 <= nx < side and 0 <= ny < side):
+            return len(seen)
+        if obstacles[ny * side + nx]:
+            facing = (facing + 1) % 4
+        else:
+            x, y = nx, ny
+
+
+def generate(fout: TextIO, *, scale: float, rnd: random.Random):
+    """Square map with ~5% obstacles and a guard facing up, the longest patrol leaving the map out of a few tries.
+
+    The scale can be a fraction, for maps smaller than the puzzle's.
+    """
+    side = max(2, round(130 * math.sqrt(scale)))
+    obstacles = bytearray(rnd.randbytes(side * side).translate(_OBSTACLES))
+    guard, longest = None, 0
+    for _ in range(20):
+        candidate = rnd.randrange(side * side)
+        if obstacles[candidate]:
+            continue
+        length = _patrol_length(obstacles, side, candidate % side, candidate // side)
+        if length is not None and length > longest:
+            guard, longest = candidate, length
+    if guard is None:
+        # clear the way up
+        guard = rnd.randrange(side * side)
+        obstacles[guard % side : guard + 1 : side] = bytes(guard // side + 1)
+
+    for y in range(side):
+        line = obstacles[y * side : (y + 1) * side].translate(_CELLS)
+        if guard // side == y:
+            line[guard % side] = ord("^")
+        fout.write(line.decode() + "\n")
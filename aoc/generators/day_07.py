@@ -0,0 +1,29 @@
+import random
+from typing import TextIO
+
+# like the puzzle, totals fit in 15 digits
+MAX_TOTAL = pow(10, 15)
+# how many equations of 3 to 12 numbers the puzzle input has
+LENGTH_WEIGHTS = (29, 16, 235, 122, 87, 85, 81, 77, 72, 46)
+
+
+def generate(fout: TextIO, *, scale: float, rnd: random.Random):
+    """Equations of 3 to 12 small numbers, most of which balance with +, * or ||, a fractional scale gives fewer"""
+    for _ in range(max(1, round(850 * scale))):
+        numbers = [
+            rnd.randint(1, rnd.choice((9, 9, 9, 99, 99, 999)))
+            for _ in range(rnd.choices(range(3, 13), LENGTH_WEIGHTS)[0])
+        ]
+        total = numbers[0]
+        for number in numbers[1:]:
+            match rnd.randrange(3):
+                case 0:
+                    candidate = total * number
+                case 1:
+                    candidate = int(f"{total}{number}")
+                case _:
+                    candidate = total + number
+            total = candidate if candidate < MAX_TOTAL else total + number
+        if rnd.random() < 0.4:
+            total += rnd.randint(1, 9)
+        fout.write(f"{total}: {' '.join(map(str, numbers))}\n")
@@ -0,0 +1,15 @@
+import math
+import random
+import string
+from typing import TextIO
+
+FREQUENCIES = string.digits + string.ascii_letters
+
+
+def generate(fout: TextIO, *, scale: int, rnd: random.Random):
+    """Square map with ~7% of cells holding an antenna of one of 62 frequencies"""
+    side = round(50 * math.sqrt(scale))
+    antennas = {idx: rnd.choice(FREQUENCIES) for idx in rnd.sample(range(side * side), side * side * 7 // 100)}
+    for y in range(side):
+        row_start = y * side
+        fout.write("".join((antennas.get(row_start + x, ".") for x in range(side))) + "\n")
@@ -0,0 +1,10 @@
+import random
+from typing import TextIO
+
+
+def generate(fout: TextIO, *, scale: int, rnd: random.Random):
+    """Dense disk map alternating files of 1 to 9 blocks and free spaces of 0 to 9 blocks"""
+    for _ in range(scale):
+        # chunks of 19998 digits, always a file then a free space
+        fout.write("".join((f"{rnd.randint(1, 9)}{rnd.randint(0, 9)}" for _ in range(9999))))
+    fout.write(f"{rnd.randint(1, 9)}\n")
@@ -0,0 +1,24 @@
+import pytest
+
+from aoc.days import DAYS
+from aoc.generators import GENERATORS, generate
+
+
+@pytest.mark.parametrize("day", sorted(GENERATORS.keys()))
+def test_generate(day, tmp_path):
+    first = generate(day, tmp_path / "first.txt", scale=1, seed=3)
+    again = generate(day, tmp_path / "again.txt", scale=1, seed=3)
+    other = generate(day, tmp_path / "other.txt", scale=1, seed=4)
+    assert first.read_bytes() == again.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+
+    solver = DAYS[day].load()
+    solver.part_1(solver.parse(first))
+
+
+@pytest.mark.parametrize("day", sorted(GENERATORS.keys()))
+def test_generate_scales(day, tmp_path):
+    small = generate(day, tmp_path / "small.txt", scale=1)
+    large = generate(day, tmp_path / "large.txt", scale=4)
+    # day 5 rules do not grow with the scale
+    assert 2 < large.stat().st_size / small.stat().st_size < 5
@@ -0,0 +1,125 @@
+from pathlib import Path
+from typing import Iterable, Iterator, Self
+
+from aoc.reader import lines, mapped
+
+# (dx, dy), y grows downward
+UP = (0, -1)
+RIGHT = (1, 0)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+# clockwise from UP
+DIRECTIONS_4 = (UP, RIGHT, DOWN, LEFT)
+DIRECTIONS_8 = ((-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0))
+DIAGONALS = ((-1, -1), (1, -1), (1, 1), (-1, 1))
+
+# value of the cells padding the grid
+OUTSIDE = 0
+
+
+class Grid:
+    """Character grid in one flat bytearray, positions are ints packing (x, y).
+
+    The grid is surrounded by `padding` rows and columns of OUTSIDE so that walking up to
+    `padding` steps away from any inside cell needs no bounds check.
+    """
+
+    __slots__ = ("width", "height", "padding", "stride", "cells")
+
+    def __init__(self, width: int, height: int, *, padding: int = 1, fill: bytes = b"."):
+        self.width = width
+        self.height = height
+        self.padding = padding
+        self.stride = width + 2 * padding
+        self.cells = bytearray(self.stride * (height + 2 * padding))
+        for y in range(height):
+            start = self.index(0, y)
+            self.cells[start : start + width] = fill * width
+
+    @classmethod
+    def from_buffer(cls, width: int, height: int, cells: bytearray | memoryview, *, padding: int = 1) -> Self:
+        """Grid over existing padded cells, e.g. shared memory, without copying them"""
+        obj = cls.__new__(cls)
+        obj.width = width
+        obj.height = height
+        obj.padding = padding
+        obj.stride = width + 2 * padding
+        if len(cells) != obj.stride * (height + 2 * padding):
+            raise ValueError(f"{len(cells)} cells do not match a padded {width}x{height} grid")
+        obj.cells = cells
+        return obj
+
+    @classmethod
+    def from_lines(cls, lines: list[bytes | memoryview], *, padding: int = 1) -> Self:
+        width = len(lines[0]) if lines else 0
+        obj = cls(width, len(lines), padding=padding)
+        obj._copy_lines(lines)
+        return obj
+
+    @classmethod
+    def from_file(cls, filename: Path | str, *, padding: int = 1) -> Self:
+        """Copies the lines of the mapped file straight into the cells, skipping empty lines"""
+        with mapped(filename) as data:
+            # each view is released by the next one, so the size is found in a first pass
+            height = sum((1 for _ in lines(data)))
+            width = next((len(line) for line in lines(data)), 0)
+            obj = cls(width, height, padding=padding)
+            obj._copy_lines(lines(data))
+        return obj
+
+    def _copy_lines(self, lines: Iterable[bytes | memoryview]):
+        for y, line in enumerate(lines):
+            if len(line) != self.width:
+                raise ValueError(f"Line {y} has {len(line)} cells, expected {self.width}")
+            start = self.index(0, y)
+            self.cells[start : start + self.width] = line
+
+    def index(self, x: int, y: int) -> int:
+        return (y + self.padding) * self.stride + x + self.padding
+
+    def xy(self, idx: int) -> tuple[int, int]:
+        y, x = divmod(idx, self.stride)
+        return x - self.padding, y - self.padding
+
+    def delta(self, direction: tuple[int, int]) -> int:
+        return direction[1] * self.stride + direction[0]
+
+    def deltas(self, directions: tuple[tuple[int, int], ...]) -> tuple[int, ...]:
+        return tuple((self.delta(direction) for direction in directions))
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def inside(self, idx: int) -> bool:
+        return 0 <= idx < len(self.cells) and self.cells[idx] != OUTSIDE
+
+    def __getitem__(self, idx: int) -> int:
+        return self.cells[idx]
+
+    def __setitem__(self, idx: int, value: int):
+        self.cells[idx] = value
+
+    def find_all(self, char: bytes) -> Iterator[int]:
+        """Positions holding char, searched in C"""
+        cells = self.cells
+        idx = cells.find(char)
+        while idx >= 0:
+            yield idx
+            idx = cells.find(char, idx + 1)
+
+    def positions(self) -> Iterator[int]:
+        for y in range(self.height):
+            start = self.index(0, y)
+            yield from range(start, start + self.width)
+
+    def neighbours(self, idx: int, directions: tuple[tuple[int, int], ...] = DIRECTIONS_8) -> Iterator[int]:
+        """Neighbours inside the grid, needs padding >= 1"""
+        cells = self.cells
+        for delta in self.deltas(directions):
+            if cells[idx + delta] != OUTSIDE:
+                yield idx + delta
+
+    def rows(self) -> Iterator[bytearray]:
+        for y in range(self.height):
+            start = self.index(0, y)
+            yield self.cells[start : start + self.width]
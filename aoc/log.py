@@ -0,0 +1,88 @@
+import logging
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Self
+
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+
+def get_logger(day: str) -> logging.Logger:
+    """Logger of a day, e.g. `day_04`; messages use %-style arguments, only formatted when emitted"""
+    return logging.getLogger(f"aoc.{day}")
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """`warning,day_09=debug` -> {"": WARNING, "day_09": DEBUG}, "" being every day"""
+    levels = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, level = part.rpartition("=")
+        if level.lower() not in LEVELS:
+            raise ValueError(f"Unknown log level {level!r}, expected one of {', '.join(LEVELS)}")
+        levels[name] = LEVELS[level.lower()]
+    return levels
+
+
+def configure_logging(spec: str = "info"):
+    """One level for all days, overridden per day"""
+    root = logging.getLogger("aoc")
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+    for name, level in parse_levels(spec).items():
+        (get_logger(name) if name else root).setLevel(level)
+
+
+def add_log_arguments(parser: ArgumentParser, *, default: str | None = "info"):
+    parser.add_argument(
+        "--log-level", type=str, default=default, help="debug, info, warning or error, per day with day_09=debug"
+    )
+
+
+class Progress:
+    """Logs how far a loop got, at most once every `interval` seconds.
+
+    When the level is disabled, update only tests a boolean.
+    """
+
+    def __init__(
+        self, logger: logging.Logger, label: str, total: int, *, interval: float = 1.0, level: int = logging.INFO
+    ):
+        self.logger = logger
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.level = level
+        self.enabled = logger.isEnabledFor(level)
+        self._start = time.monotonic()
+        self._next = self._start + interval
+
+    def update(self, done: int):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now < self._next:
+            return
+        self._next = now + self.interval
+        self.logger.log(
+            self.level, "  -> %s %d/%d (%.0f%%)", self.label, done, self.total, 100 * done / max(self.total, 1)
+        )
+
+    def __enter__(self) -> Self:
+        if self.enabled:
+            self.logger.log(self.level, "%s", self.label)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.enabled and exc_info[0] is None:
+            self.logger.log(self.level, "  -> %s done in %.2fs", self.label, time.monotonic() - self._start)
@@ -0,0 +1,155 @@
+import dataclasses
+import hashlib
+import inspect
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from aoc.days import ROOT
+
+MEMO_DB = ROOT / ".cache" / "results.sqlite"
+DEFAULT_MAX_AGE_S = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 16 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    function TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+)
+"""
+
+
+def _param(value: Any) -> Any:
+    """Parameters as JSON, operators and other named objects by name"""
+    if (name := getattr(value, "name", None)) is not None:
+        return name
+    return repr(value)
+
+
+def _canonical(value: Any) -> Any:
+    """A collection of named objects, such as a set of operators, by its sorted names"""
+    if isinstance(value, (list, tuple, set, frozenset)) and value and all(hasattr(item, "name") for item in value):
+        return sorted(item.name for item in value)
+    return value
+
+
+def function_name(func: Callable) -> str:
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+@dataclasses.dataclass(kw_only=True)
+class ResultStore:
+    """Answers of solved inputs in SQLite, keyed by input content, function, parameters and solver version.
+
+    Entries unused for max_age_s are dropped when the store is opened, then the least recently used ones whenever
+    the entries go above max_bytes.
+    """
+
+    path: Path = MEMO_DB
+    max_age_s: float = DEFAULT_MAX_AGE_S
+    max_bytes: int = DEFAULT_MAX_BYTES
+    hits: int = 0
+    misses: int = 0
+    # opened on first use, so that the store can be sent to worker processes
+    _connection: sqlite3.Connection | None = dataclasses.field(default=None, repr=False, compare=False)
+    # size of the entries as of the last eviction, plus the ones put since
+    _bytes: int = dataclasses.field(default=0, repr=False, compare=False)
+
+    def __getstate__(self) -> dict:
+        return {**self.__dict__, "_connection": None}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._connection.execute(_SCHEMA)
+            self.evict()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def key(*, content_hash: str, function: str, params: dict[str, Any], version: int) -> str:
+        params = {name: _canonical(value) for name, value in params.items()}
+        params_json = json.dumps(params, sort_keys=True, default=_param)
+        return hashlib.sha256(f"{content_hash}:{function}:{params_json}:{version}".encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """(found, value), a hit refreshes the entry"""
+        row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.connection.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        return True, json.loads(row[0])
+
+    def put(self, key: str, function: str, value: Any) -> bool:
+        """False when the value cannot be stored as JSON"""
+        try:
+            value_json = json.dumps(value)
+        except TypeError:
+            return False
+        now = time.time()
+        size = len(key) + len(function) + len(value_json)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results (key, function, value, size, created, used) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, function, value_json, size, now, now),
+        )
+        self._bytes += size
+        if self._bytes > self.max_bytes:
+            self.evict()
+        return True
+
+    def evict(self) -> int:
+        """Removes the entries too old or above max_bytes, returns how many"""
+        connection = self.connection
+        removed = connection.execute("DELETE FROM results WHERE used < ?", (time.time() - self.max_age_s,)).rowcount
+        removed += connection.execute(
+            """
+            DELETE FROM results WHERE key IN (
+                SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS total FROM results)
+                WHERE total > ?
+            )
+            """,
+            (self.max_bytes,),
+        ).rowcount
+        self._bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        return removed
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def memoize(self, func: Callable, *, content_hash: str, version: int, **params: Any) -> Callable[[Any], Any]:
+        """func(data, **params), answered from the store when this input was already solved.
+
+        The key has every keyword parameter of func, its defaults included, so that changing one misses.
+        """
+        function = function_name(func)
+        effective = {
+            name: parameter.default
+            for name, parameter in list(inspect.signature(func).parameters.items())[1:]
+            if parameter.default is not parameter.empty
+        }
+        effective.update(params)
+        key = self.key(content_hash=content_hash, function=function, params=effective, version=version)
+
+        def memoized(data: Any) -> Any:
+            found, value = self.get(key)
+            if found:
+                return value
+            value = func(data, **params)
+            self.put(key, function, value)
+            return value
+
+        return memoized
@@ -0,0 +1,104 @@
+import contextlib
+import cProfile
+import dataclasses
+import pstats
+import sys
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Iterator, TextIO
+
+
+def add_profile_arguments(parser: ArgumentParser):
+    parser.add_argument("--profile", action="store_true", help="Profile each phase with cProfile")
+    parser.add_argument("--profile-dir", type=str, default="profiles", help="Where to dump the .prof files")
+    parser.add_argument("--profile-top", type=int, default=20, help="Functions and allocation sites to report")
+    parser.add_argument("--profile-memory", action="store_true", help="Also report allocations with tracemalloc")
+
+
+@dataclasses.dataclass(kw_only=True)
+class Profiler:
+    """cProfile, and optionally tracemalloc, around named phases; does nothing when disabled.
+
+    A phase entered several times accumulates in the same profile, and its allocation sites sum their
+    differences over the entries.
+    """
+
+    enabled: bool = True
+    output_dir: Path = Path("profiles")
+    top: int = 20
+    memory: bool = False
+    # kept from construction, solvers output may be redirected meanwhile
+    stream: TextIO = dataclasses.field(default_factory=lambda: sys.stdout)
+    profiles: dict[str, cProfile.Profile] = dataclasses.field(default_factory=dict)
+    allocations: dict[str, dict[tracemalloc.Traceback, tracemalloc.StatisticDiff]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    @classmethod
+    def from_args(cls, args: Namespace) -> "Profiler":
+        return cls(
+            enabled=args.profile, output_dir=Path(args.profile_dir), top=args.profile_top, memory=args.profile_memory
+        )
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        if self.memory:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            if self.memory:
+                after = tracemalloc.take_snapshot()
+                if started:
+                    tracemalloc.stop()
+                self._accumulate(name, after.compare_to(before, "lineno"))
+
+    def _accumulate(self, name: str, stats: list[tracemalloc.StatisticDiff]):
+        sites = self.allocations.setdefault(name, {})
+        for stat in stats:
+            if not stat.size_diff and not stat.count_diff:
+                continue
+            if previous := sites.get(stat.traceback):
+                stat = tracemalloc.StatisticDiff(
+                    stat.traceback,
+                    stat.size,
+                    previous.size_diff + stat.size_diff,
+                    stat.count,
+                    previous.count_diff + stat.count_diff,
+                )
+            sites[stat.traceback] = stat
+
+    def top_allocations(self, name: str) -> list[tracemalloc.StatisticDiff]:
+        """The phase's allocation sites with the largest summed differences, as tracemalloc sorts them"""
+        stats = self.allocations.get(name, {}).values()
+        return sorted(stats, key=lambda stat: (abs(stat.size_diff), stat.size, abs(stat.count_diff)), reverse=True)[
+            : self.top
+        ]
+
+    def report(self):
+        """Prints the top functions by cumulative time and allocation sites, dumps one .prof per phase"""
+        if not self.profiles:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for name, profile in self.profiles.items():
+            filename = self.output_dir / f"{name}.prof"
+            profile.dump_stats(filename)
+            print(f"== {name}: wrote {filename}", file=self.stream)
+            pstats.Stats(profile, stream=self.stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            if name in self.allocations:
+                print(f"== {name}: top {self.top} allocation sites", file=self.stream)
+                for stat in self.top_allocations(name):
+                    print(f"  -> {stat}", file=self.stream)
+        self.profiles.clear()
+        self.allocations.clear()
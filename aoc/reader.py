@@ -0,0 +1,62 @@
+import contextlib
+import mmap
+from pathlib import Path
+from typing import Iterator
+
+# fields can be separated by whitespace, commas or colons
+_SEPARATORS = bytes.maketrans(b",:", b"  ")
+_CR = ord("\r")
+
+
+@contextlib.contextmanager
+def mapped(filename: Path | str) -> Iterator[mmap.mmap | bytes]:
+    """The whole file memory mapped, b"" when empty; views on it are only valid inside the block"""
+    with open(filename, "rb") as fin:
+        try:
+            data = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            data = None
+    if data is None:
+        yield b""
+        return
+    with data:
+        yield data
+
+
+def lines(data: mmap.mmap | bytes, *, keep_empty: bool = False) -> Iterator[memoryview]:
+    """Zero-copy slices of each line, without its line ending, each released when the next one is asked for"""
+    with memoryview(data) as view:
+        start = 0
+        end = len(data)
+        while start < end:
+            stop = data.find(b"\n", start)
+            if stop < 0:
+                stop = end
+            line_end = stop - 1 if stop > start and data[stop - 1] == _CR else stop
+            if line_end > start or keep_empty:
+                with view[start:line_end] as line:
+                    yield line
+            start = stop + 1
+
+
+def blocks(data: mmap.mmap | bytes, size: int = 1 << 20, *, whole_lines: bool = False) -> Iterator[memoryview]:
+    """Zero-copy slices of about size bytes, each released when the next one is asked for
+
+    With whole_lines, each slice is extended to the end of its last line.
+    """
+    with memoryview(data) as view:
+        start = 0
+        end = len(data)
+        while start < end:
+            stop = min(start + size, end)
+            if whole_lines and stop < end:
+                stop = data.find(b"\n", stop - 1) + 1 or end
+            with view[start:stop] as block:
+                yield block
+            start = stop
+
+
+def parse_ints(field: bytes | memoryview) -> list[int]:
+    """Integers separated by whitespace, commas or colons, e.g. b"190: 10 19" -> [190, 10, 19]"""
+    return list(map(int, bytes(field).translate(_SEPARATORS).split()))
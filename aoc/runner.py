@@ -0,0 +1,355 @@
+import contextlib
+import dataclasses
+import functools
+import json
+import os
+import resource
+import signal
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable
+
+from aoc.cache import ParseCache, content_hash
+from aoc.days import DAYS, Day, resolve
+from aoc.engines import Selector
+from aoc.log import configure_logging
+from aoc.memo import ResultStore
+from aoc.profiling import Profiler
+from aoc.stats import COUNTERS, print_counters
+
+PHASES = ("parse", "part_1", "part_2")
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class PhaseTiming:
+    runs_ns: list[int]
+
+    @property
+    def min_ns(self) -> int:
+        return min(self.runs_ns)
+
+    @property
+    def median_ns(self) -> float:
+        return statistics.median(self.runs_ns)
+
+    @property
+    def p95_ns(self) -> int:
+        ordered = sorted(self.runs_ns)
+        # nearest rank
+        return ordered[max(0, -(-95 * len(ordered) // 100) - 1)]
+
+    def to_json(self) -> dict:
+        return {
+            "min_ns": self.min_ns,
+            "median_ns": self.median_ns,
+            "p95_ns": self.p95_ns,
+            "runs_ns": self.runs_ns,
+        }
+
+
+@dataclasses.dataclass(kw_only=True)
+class DayReport:
+    day: int
+    input: str
+    answers: dict[str, Any] = dataclasses.field(default_factory=dict)
+    phases: dict[str, PhaseTiming] = dataclasses.field(default_factory=dict)
+    cache_hits: int = 0
+    memo_hits: int = 0
+    engine: str = "default"
+    # phase -> counter name -> count, from the first repeat
+    counters: dict[str, dict[str, int]] = dataclasses.field(default_factory=dict)
+    # only measured when the day runs in its own process
+    peak_rss_kb: int | None = None
+    error: str | None = None
+
+    def to_json(self) -> dict:
+        return {
+            "day": self.day,
+            "input": self.input,
+            "cache_hits": self.cache_hits,
+            "memo_hits": self.memo_hits,
+            "engine": self.engine,
+            "answers": self.answers,
+            "phases": {name: timing.to_json() for name, timing in self.phases.items()},
+            "counters": self.counters,
+            "peak_rss_kb": self.peak_rss_kb,
+            "error": self.error,
+        }
+
+
+def _timed(func: Callable, *args) -> tuple[Any, int]:
+    start = time.perf_counter_ns()
+    result = func(*args)
+    return result, time.perf_counter_ns() - start
+
+
+def _counting(enabled: bool) -> contextlib.AbstractContextManager:
+    return COUNTERS.collect() if enabled else contextlib.nullcontext({})
+
+
+def run_day(
+    day: Day,
+    filename: Path | str,
+    *,
+    repeat: int = 1,
+    verbose: bool = False,
+    cache: ParseCache | None = None,
+    profiler: Profiler | None = None,
+    stats: bool = False,
+    memo: ResultStore | None = None,
+    selector: Selector | None = None,
+) -> DayReport:
+    """With a cache, the parse phase times loading the cached structure once it is stored.
+    With a memo, the parts time looking up the answers of an input already solved.
+    With a selector, the engine is chosen from the size of the first parsed input; an engine with its own parser
+    then parses again, and the parse phase times that parser.
+
+    A profiler accumulates each phase over the repeats, its overhead is included in the timings,
+    as is counting with stats.
+    """
+    profiler = profiler or Profiler(enabled=False)
+    solver = day.load()
+    runs = {phase: [] for phase in PHASES}
+    report = DayReport(day=day.day, input=str(filename))
+    parse = _parser(day, solver.parse, cache)
+    if cache is not None:
+        hits = cache.hits
+
+    parts = {"part_1": solver.part_1, "part_2": solver.part_2}
+    params = {"part_1": day.part_1_params, "part_2": day.part_2_params}
+    if memo is not None:
+        memo_hits = memo.hits
+        input_hash = content_hash(filename)
+
+    with contextlib.ExitStack() as stack:
+        # solvers print their progress, only keep it when asked to
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        for i in range(repeat):
+            counting = stats and i == 0
+            with profiler.phase(f"day_{day.day:02d}_parse"), _counting(counting) as counts:
+                data, elapsed = _timed(parse, filename)
+            runs["parse"].append(elapsed)
+            if counting:
+                report.counters["parse"] = dict(counts)
+            if i == 0:
+                if selector is not None and (selected := selector.select(day.day, data)) is not None:
+                    engine, parts = selected
+                    report.engine = engine.name
+                    if engine.parse is not None:
+                        # the day's parse only picked the engine, the parse phase times the engine's own
+                        engine_day = dataclasses.replace(day, parse=engine.parse)
+                        parse = _parser(engine_day, resolve(day.module, engine.parse), cache)
+                        with profiler.phase(f"day_{day.day:02d}_parse"), _counting(counting) as counts:
+                            data, elapsed = _timed(parse, filename)
+                        runs["parse"][-1] = elapsed
+                        if counting:
+                            report.counters["parse"] = dict(counts)
+                if memo is not None:
+                    parts = {
+                        phase: memo.memoize(func, content_hash=input_hash, version=day.solver_version, **params[phase])
+                        for phase, func in parts.items()
+                    }
+                else:
+                    parts = {
+                        phase: functools.partial(func, **params[phase]) if params[phase] else func
+                        for phase, func in parts.items()
+                    }
+            for phase, func in parts.items():
+                with profiler.phase(f"day_{day.day:02d}_{phase}"), _counting(counting) as counts:
+                    answer, elapsed = _timed(func, data)
+                runs[phase].append(elapsed)
+                if counting:
+                    report.counters[phase] = dict(counts)
+                if report.answers.setdefault(phase, answer) != answer:
+                    raise RuntimeError(f"Day {day.day} {phase} gave {answer} after {report.answers[phase]}")
+
+    report.phases = {phase: PhaseTiming(runs_ns=runs_ns) for phase, runs_ns in runs.items()}
+    if cache is not None:
+        report.cache_hits = cache.hits - hits
+    if memo is not None:
+        report.memo_hits = memo.hits - memo_hits
+    return report
+
+
+def _parser(day: Day, parse: Callable[[Path | str], Any], cache: ParseCache | None) -> Callable[[Path | str], Any]:
+    if cache is None:
+        return parse
+
+    def cached(filename: Path | str) -> Any:
+        return cache.parse(day, parse, filename)
+
+    return cached
+
+
+def input_for(day: Day, *, input_name: str = "input.txt", input_dir: Path | str | None = None) -> Path:
+    """day_XX/<input_name> or, for generated inputs, <input_dir>/day_XX.txt"""
+    if input_dir is not None:
+        return Path(input_dir) / f"day_{day.day:02d}.txt"
+    return day.input_file(input_name)
+
+
+def run(
+    days: list[int],
+    *,
+    repeat: int = 1,
+    input_name: str = "input.txt",
+    input_dir: Path | str | None = None,
+    verbose: bool = False,
+    cache: ParseCache | None = None,
+    profiler: Profiler | None = None,
+    stats: bool = False,
+    memo: ResultStore | None = None,
+    selector: Selector | None = None,
+) -> list[DayReport]:
+    reports = []
+    for day_number in days:
+        day = DAYS[day_number]
+        filename = input_for(day, input_name=input_name, input_dir=input_dir)
+        reports.append(
+            run_day(
+                day,
+                filename,
+                repeat=repeat,
+                verbose=verbose,
+                cache=cache,
+                profiler=profiler,
+                stats=stats,
+                memo=memo,
+                selector=selector,
+            )
+        )
+    return reports
+
+
+class DayTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise DayTimeout()
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _run_day_isolated(
+    day_number: int, filename: Path, *, timeout: float | None, log_level: str | None, **kwargs
+) -> DayReport:
+    """run_day in a worker process, interrupted by SIGALRM after timeout seconds"""
+    # the workers are spawned, without the logging configuration of the parent
+    if log_level is not None:
+        configure_logging(log_level)
+    if timeout is not None:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        report = run_day(DAYS[day_number], filename, **kwargs)
+    except DayTimeout:
+        report = DayReport(day=day_number, input=str(filename), error=f"timed out after {timeout}s")
+    except Exception as e:
+        report = DayReport(day=day_number, input=str(filename), error=repr(e))
+    finally:
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    report.peak_rss_kb = _peak_rss_kb()
+    return report
+
+
+def run_parallel(
+    days: list[int],
+    *,
+    max_workers: int | None = None,
+    timeout: float | None = None,
+    repeat: int = 1,
+    input_name: str = "input.txt",
+    input_dir: Path | str | None = None,
+    verbose: bool = False,
+    cache: ParseCache | None = None,
+    stats: bool = False,
+    memo: ResultStore | None = None,
+    selector: Selector | None = None,
+    log_level: str | None = None,
+) -> list[DayReport]:
+    """Each day in a fresh worker process, a day failing, crashing its worker or running over timeout seconds only
+    reports an error"""
+    reports = []
+    # one process per day, so that the peak RSS is the day's own
+    with ProcessPoolExecutor(max_workers=max_workers, max_tasks_per_child=1) as executor:
+        futures = {}
+        for day_number in days:
+            filename = input_for(DAYS[day_number], input_name=input_name, input_dir=input_dir)
+            future = executor.submit(
+                _run_day_isolated,
+                day_number,
+                filename,
+                timeout=timeout,
+                log_level=log_level,
+                repeat=repeat,
+                verbose=verbose,
+                cache=cache,
+                stats=stats,
+                memo=memo,
+                selector=selector,
+            )
+            futures[future] = (day_number, filename)
+        for future in as_completed(futures):
+            try:
+                reports.append(future.result())
+            except BrokenProcessPool as e:
+                # a worker killed e.g. by the OOM killer breaks the pool, the days still pending report it too
+                day_number, filename = futures[future]
+                reports.append(DayReport(day=day_number, input=str(filename), error=repr(e)))
+    return sorted(reports, key=lambda report: report.day)
+
+
+def to_json(reports: list[DayReport], *, repeat: int) -> dict:
+    return {
+        "repeat": repeat,
+        "days": [report.to_json() for report in reports],
+    }
+
+
+def _ms(ns: float) -> str:
+    return f"{ns / 1e6:10.3f}"
+
+
+def print_reports(reports: list[DayReport]):
+    print(f"{'day':>3} {'phase':<7} {'min ms':>10} {'median ms':>10} {'p95 ms':>10}  answer")
+    for report in reports:
+        if report.error:
+            print(f"{report.day:>3} {'error':<7} {report.error}")
+        if report.engine != "default":
+            print(f"{report.day:>3} {'engine':<7} {report.engine}")
+        if report.peak_rss_kb is not None:
+            print(f"{report.day:>3} {'rss':<7} {report.peak_rss_kb / 1024:10.1f} MB peak")
+        for phase, timing in report.phases.items():
+            answer = report.answers.get(phase, "")
+            print(
+                f"{report.day:>3} {phase:<7} {_ms(timing.min_ns)} {_ms(timing.median_ns)} {_ms(timing.p95_ns)}  {answer}"
+            )
+
+
+def write_json(data: dict, output: str):
+    """`-` writes to stdout"""
+    content = json.dumps(data, indent=2)
+    if output == "-":
+        print(content)
+    else:
+        Path(output).write_text(content + "\n")
+        print(f"Wrote {output}")
+
+
+def print_report_counters(reports: list[DayReport]):
+    for report in reports:
+        for phase, counters in report.counters.items():
+            if counters:
+                print(f"{report.day:>3} {phase}")
+                print_counters(counters, indent="    ")
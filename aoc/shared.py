@@ -0,0 +1,88 @@
+import contextlib
+import dataclasses
+import sys
+from array import array
+from multiprocessing import shared_memory
+from typing import Iterator
+
+from aoc.grid import Grid
+
+# every buffer starts on a multiple of this, so that any typecode can be cast
+_ALIGN = 8
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class SharedSegment:
+    """Picklable handle on buffers published in one shared memory segment"""
+
+    name: str
+    # key -> (typecode, offset in bytes, number of items)
+    layout: dict[str, tuple[str, int, int]]
+    # small values sent along, e.g. the grid width
+    meta: dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+def _typecode(buffer: array | bytes | bytearray | memoryview) -> str:
+    if isinstance(buffer, array):
+        return buffer.typecode
+    if isinstance(buffer, memoryview):
+        return buffer.format
+    return "B"
+
+
+@contextlib.contextmanager
+def publish(
+    buffers: dict[str, array | bytes | bytearray | memoryview], *, meta: dict[str, int] | None = None
+) -> Iterator[SharedSegment]:
+    """Copies the buffers once into a new segment, unlinked on exit even when a worker crashed"""
+    layout = {}
+    size = 0
+    for key, buffer in buffers.items():
+        with memoryview(buffer) as view:
+            layout[key] = (_typecode(buffer), size, len(view))
+            size += -(-view.nbytes // _ALIGN) * _ALIGN
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        for key, buffer in buffers.items():
+            with memoryview(buffer) as view:
+                start = layout[key][1]
+                segment.buf[start : start + view.nbytes] = view.cast("B")
+        yield SharedSegment(name=segment.name, layout=layout, meta=meta or {})
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+@contextlib.contextmanager
+def attach(handle: SharedSegment) -> Iterator[dict[str, memoryview]]:
+    """Read-only typed views on the published buffers, released on exit"""
+    if sys.version_info >= (3, 13):
+        segment = shared_memory.SharedMemory(name=handle.name, track=False)
+    else:
+        segment = shared_memory.SharedMemory(name=handle.name)
+    views = {}
+    try:
+        with segment.buf.toreadonly() as buf:
+            for key, (typecode, start, length) in handle.layout.items():
+                nbytes = length * array(typecode).itemsize
+                views[key] = buf[start : start + nbytes].cast(typecode)
+            try:
+                yield views
+            finally:
+                for view in views.values():
+                    view.release()
+    finally:
+        segment.close()
+
+
+@contextlib.contextmanager
+def publish_grid(grid: Grid, **buffers: array | bytes | bytearray) -> Iterator[SharedSegment]:
+    """A grid's cells, its shape in meta, and any extra buffers"""
+    meta = {"width": grid.width, "height": grid.height, "padding": grid.padding}
+    with publish({"cells": grid.cells, **buffers}, meta=meta) as handle:
+        yield handle
+
+
+def attached_grid(handle: SharedSegment, views: dict[str, memoryview]) -> Grid:
+    """Grid over the shared cells of publish_grid, valid while attached"""
+    return Grid.from_buffer(handle.meta["width"], handle.meta["height"], views["cells"], padding=handle.meta["padding"])
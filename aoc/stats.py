@@ -0,0 +1,56 @@
+import contextlib
+from argparse import ArgumentParser
+from collections import Counter
+from typing import Iterator
+
+
+class Counters:
+    """Named counts of algorithmic work, e.g. `day_06.guard_steps`.
+
+    Hot paths test `enabled` before calling add, or count in a local and add it once,
+    so nothing is recorded and almost nothing is spent when disabled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.values: Counter[str] = Counter()
+
+    def add(self, name: str, count: int = 1):
+        self.values[name] += count
+
+    def reset(self):
+        self.values.clear()
+
+    @contextlib.contextmanager
+    def collect(self) -> Iterator[Counter[str]]:
+        """Counts of the enclosed code only, enabled meanwhile"""
+        enabled, values = self.enabled, self.values
+        self.enabled, self.values = True, Counter()
+        try:
+            yield self.values
+        finally:
+            collected = self.values
+            self.enabled, self.values = enabled, values
+            if enabled:
+                values.update(collected)
+
+
+COUNTERS = Counters()
+
+
+def add_stats_arguments(parser: ArgumentParser):
+    parser.add_argument("--stats", action="store_true", help="Count the work done in the hot paths")
+
+
+@contextlib.contextmanager
+def counting(enabled: bool) -> Iterator[None]:
+    """--stats of a day's main: counts the enclosed code then prints the counters"""
+    COUNTERS.enabled = enabled
+    yield
+    if enabled:
+        print_counters(COUNTERS.values)
+
+
+def print_counters(values: dict[str, int], *, indent: str = ""):
+    for name, count in sorted(values.items()):
+        print(f"{indent}{name:<40} {count:>14,}")
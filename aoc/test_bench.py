@@ -0,0 +1,61 @@
+import pytest
+
+from aoc.__main__ import main
+from aoc.bench import Point, compare, fit_exponent, load_baseline, load_baselines, run_benchmark, save_baseline
+from aoc.engines import machine
+
+
+def test_fit_exponent():
+    linear = [Point(scale=s, size=100 * s, min_ns=5000 * s) for s in (1, 2, 4, 8)]
+    quadratic = [Point(scale=s, size=100 * s, min_ns=5000 * s * s) for s in (1, 2, 4, 8)]
+    assert fit_exponent(linear) == pytest.approx(1.0)
+    assert fit_exponent(quadratic) == pytest.approx(2.0)
+    assert fit_exponent(linear[:1]) is None
+
+
+def _results(min_ns: int, machine: str = "host") -> dict:
+    return {"machine": machine, "days": {"1": {"parse": {"points": [{"scale": 1, "size": 10, "min_ns": min_ns}]}}}}
+
+
+def test_compare():
+    assert compare(_results(10_000_000), _results(11_000_000), max_increase_pct=20) == []
+    regressions = compare(_results(10_000_000), _results(13_000_000), max_increase_pct=20)
+    assert [(r.day, r.phase, r.scale) for r in regressions] == [("1", "parse", 1)]
+    # below the noise floor
+    assert compare(_results(10_000), _results(90_000), min_time_ms=1.0) == []
+    with pytest.raises(ValueError):
+        compare(_results(10_000_000, machine="other"), _results(10_000_000))
+
+
+def test_run_benchmark():
+    results = run_benchmark([1], [1, 2], repeat=1)
+    points = results["days"]["1"]["part_1"]["points"]
+    assert [point["scale"] for point in points] == [1, 2]
+    assert points[1]["size"] > points[0]["size"]
+    assert results["days"]["1"]["parse"]["exponent"] is not None
+
+
+def test_bench_without_baseline(tmp_path):
+    argv = ["bench", "--days", "1", "--scales", "1", "--repeat", "1", "--baseline", str(tmp_path / "baseline.json")]
+    with pytest.raises(SystemExit) as exited:
+        main(argv)
+    assert exited.value.code != 0
+    main([*argv, "--save"])
+    # against the saved baseline; timings of a single run are too noisy to compare here
+    main([*argv, "--min-time-ms", "1000"])
+
+
+def test_bench_other_machine(tmp_path):
+    filename = tmp_path / "baseline.json"
+    save_baseline(_results(1, machine="other"), filename)
+    assert load_baseline(filename) is None
+    with pytest.raises(SystemExit) as exited:
+        main(["bench", "--days", "1", "--scales", "1", "--repeat", "1", "--baseline", str(filename)])
+    assert exited.value.code != 0
+    main(["bench", "--days", "1", "--scales", "1", "--repeat", "1", "--baseline", str(filename), "--save"])
+    assert set(load_baselines(filename)) == {"other", machine()}
+
+
+def test_scaled_down_days():
+    results = run_benchmark([7], [1], repeat=1)
+    assert results["days"]["7"]["part_2"]["points"][0]["size"] < 1000
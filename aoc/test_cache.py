@@ -0,0 +1,64 @@
+import os
+
+from aoc.cache import _HEADER, _MAGIC, ParseCache, dump, load
+from aoc.days import DAYS
+from aoc.grid import Grid
+from aoc.runner import run
+
+
+def test_dump_load_buffers(tmp_path):
+    grid = Grid.from_lines([b"#.", b".#"])
+    data = {"grid": grid, "cells": bytearray(b"abc"), "values": [1, 2]}
+    dump(data, tmp_path / "entry.pkl")
+    loaded = load(tmp_path / "entry.pkl")
+    assert loaded["cells"] == bytearray(b"abc")
+    assert loaded["values"] == [1, 2]
+    assert loaded["grid"].cells == grid.cells
+
+
+def test_parse_hit_and_miss(tmp_path):
+    cache = ParseCache(directory=tmp_path)
+    day = DAYS[1]
+    solver = day.load()
+    filename = day.input_file("small_ex.txt")
+    first = cache.parse(day, solver.parse, filename)
+    second = cache.parse(day, solver.parse, filename)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert solver.part_1(first) == solver.part_1(second) == 11
+
+
+def test_stale_entry_is_a_miss(tmp_path):
+    cache = ParseCache(directory=tmp_path)
+    day = DAYS[1]
+    filename = day.input_file("small_ex.txt")
+    # pickled from a class that no longer exists
+    payload = b"cday_01.compute\nRemovedClass\n."
+    cache.path(cache.key(day, filename)).write_bytes(_HEADER.pack(_MAGIC, len(payload), 0) + payload)
+    data = cache.parse(day, day.load().parse, filename)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert day.load().part_1(data) == 11
+    assert cache.parse(day, day.load().parse, filename) is not None
+    assert cache.hits == 1
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = ParseCache(directory=tmp_path, max_bytes=1 << 30)
+    for day_number in (1, 2, 8):
+        day = DAYS[day_number]
+        cache.parse(day, day.load().parse, day.input_file("small_ex.txt"))
+    for age, entry in enumerate(cache.entries()):
+        os.utime(entry, (1000 + age, 1000 + age))
+    # use day 1 again, day 2 becomes the oldest
+    cache.parse(DAYS[1], DAYS[1].load().parse, DAYS[1].input_file("small_ex.txt"))
+    entries = cache.entries()
+    assert entries[0].name.startswith("day_02-")
+    cache.max_bytes = sum((entry.stat().st_size for entry in entries[1:]))
+    assert cache.evict() == 1
+    assert [entry.name[:6] for entry in cache.entries()] == ["day_08", "day_01"]
+
+
+def test_run_with_cache(tmp_path):
+    cache = ParseCache(directory=tmp_path)
+    reports = run([5], repeat=3, input_name="small_ex.txt", cache=cache)
+    assert reports[0].cache_hits == 2
+    assert reports[0].answers == {"part_1": 143, "part_2": 123}
@@ -0,0 +1,62 @@
+import dataclasses
+
+from aoc.cache import ParseCache
+from aoc.engines import DISPATCH, Selector, calibrate_day, choose
+from aoc.runner import run
+from day_09.compute import CompactDisk
+
+
+def test_choose():
+    points = [
+        {"size": 100, "engine": "small"},
+        {"size": 10000, "engine": "large"},
+        {"size": 1000, "engine": "medium"},
+    ]
+    assert choose(points, 1) == "small"
+    assert choose(points, 300) == "small"
+    assert choose(points, 320) == "medium"
+    assert choose(points, 3100) == "medium"
+    assert choose(points, 10**9) == "large"
+    assert choose(points[:1], 10**9) == "small"
+
+
+def test_calibrate_day():
+    known = calibrate_day(dataclasses.replace(DISPATCH[8], scales=(1,)))
+    (point,) = known["points"]
+    assert point["size"] == 50 * 50
+    assert point["engine"] in {"map", "grid", "bitset"}
+    assert set(point["times_ns"]) == {"map", "grid", "bitset"}
+
+
+def test_run_selected_engine():
+    calibration = {
+        "days": {
+            "8": {"signature": DISPATCH[8].signature(), "points": [{"size": 100, "engine": "grid"}]},
+            "9": {
+                "signature": DISPATCH[9].signature(),
+                "points": [{"size": 10, "engine": "compact"}, {"size": 10**6, "engine": "disk"}],
+            },
+        }
+    }
+    reports = run([1, 8, 9], input_name="small_ex.txt", selector=Selector(calibration=calibration))
+    assert [report.engine for report in reports] == ["default", "grid", "compact"]
+    assert reports[1].answers == {"part_1": 14, "part_2": 34}
+    assert reports[2].answers == {"part_1": 1928, "part_2": 2858}
+
+
+def test_run_engine_parse(tmp_path):
+    calibration = {"days": {"9": {"signature": DISPATCH[9].signature(), "points": [{"size": 10, "engine": "compact"}]}}}
+    parsed = []
+    cache = ParseCache(directory=tmp_path)
+    for _ in range(2):
+        (report,) = run([9], input_name="small_ex.txt", cache=cache, selector=Selector(calibration=calibration))
+        parsed.append(report.answers)
+    assert parsed[0] == parsed[1] == {"part_1": 1928, "part_2": 2858}
+    # one entry per parser, the day's own and the engine's
+    assert len(cache.entries()) == 2
+    assert DISPATCH[9].parser(DISPATCH[9].engine("compact")) == CompactDisk.from_file
+
+
+def test_dispatch_sizes():
+    # one calibrated size would always pick the same engine
+    assert all((len(dispatch.scales) >= 2 for dispatch in DISPATCH.values()))
@@ -0,0 +1,20 @@
+from aoc.grid import Grid, DIRECTIONS_4, OUTSIDE, RIGHT
+
+
+def test_from_lines():
+    grid = Grid.from_lines([b"ab", b"cd", b"ef"], padding=2)
+    assert (grid.width, grid.height, grid.stride) == (2, 3, 6)
+    assert [bytes(row) for row in grid.rows()] == [b"ab", b"cd", b"ef"]
+    idx = grid.index(1, 2)
+    assert grid[idx] == ord("f")
+    assert grid.xy(idx) == (1, 2)
+    assert grid[idx + grid.delta(RIGHT)] == OUTSIDE
+    assert not grid.inside(idx + grid.delta(RIGHT))
+    assert list(grid.find_all(b"c")) == [grid.index(0, 1)]
+    assert len(list(grid.positions())) == 6
+
+
+def test_neighbours():
+    grid = Grid(3, 3)
+    assert len(list(grid.neighbours(grid.index(1, 1)))) == 8
+    assert sorted(grid.xy(idx) for idx in grid.neighbours(grid.index(0, 0), DIRECTIONS_4)) == [(0, 1), (1, 0)]
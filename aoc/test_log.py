@@ -0,0 +1,32 @@
+import logging
+
+import pytest
+
+from aoc.log import Progress, get_logger, parse_levels
+
+
+def test_parse_levels():
+    assert parse_levels("warning,day_09=debug") == {"": logging.WARNING, "day_09": logging.DEBUG}
+    with pytest.raises(ValueError):
+        parse_levels("loud")
+
+
+def test_progress(caplog):
+    logger = get_logger("day_test")
+    with caplog.at_level(logging.INFO, logger="aoc.day_test"):
+        with Progress(logger, "Looping", 10, interval=0.0) as progress:
+            for done in range(10):
+                progress.update(done)
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0] == "Looping"
+    assert messages[1] == "  -> Looping 0/10 (0%)"
+    assert messages[-1].startswith("  -> Looping done in ")
+
+
+def test_progress_disabled(caplog):
+    logger = get_logger("day_test")
+    with caplog.at_level(logging.WARNING, logger="aoc.day_test"):
+        with Progress(logger, "Looping", 10, interval=0.0) as progress:
+            assert not progress.enabled
+            progress.update(5)
+    assert caplog.records == []
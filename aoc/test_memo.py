@@ -0,0 +1,87 @@
+import dataclasses
+import time
+
+from aoc.days import DAYS
+from aoc.memo import ResultStore
+from aoc.runner import run, run_day
+from day_07.compute import Q1_OPERATORS, Q2_OPERATORS, q1_brute
+
+
+def test_key_params():
+    def key(**params):
+        return ResultStore.key(content_hash="abc", function="f", params=params, version=1)
+
+    assert key(operations=Q1_OPERATORS) == key(operations=Q1_OPERATORS)
+    assert key(operations=Q1_OPERATORS) != key(operations=Q2_OPERATORS)
+    # the operators are a set, the order they are tried in does not change the answer
+    assert key(operations=Q1_OPERATORS) == key(operations=list(reversed(Q1_OPERATORS)))
+    assert key(limit=1) != key(limit=None)
+    assert key() != ResultStore.key(content_hash="abc", function="f", params={}, version=2)
+
+
+def test_memoize(tmp_path):
+    store = ResultStore(path=tmp_path / "results.sqlite")
+    calls = []
+
+    def solve(data, *, operations):
+        calls.append(data)
+        return q1_brute(data, operations=operations)
+
+    first = store.memoize(solve, content_hash="abc", version=1, operations=Q1_OPERATORS)
+    assert first([]) == 0
+    assert first(["not used"]) == 0
+    assert calls == [[]]
+    assert (store.hits, store.misses) == (1, 1)
+    # the defaults are part of the key, passing the default operators explicitly hits
+    assert store.memoize(q1_brute, content_hash="abc", version=1)([]) == 0
+    assert store.memoize(q1_brute, content_hash="abc", version=1, operations=Q1_OPERATORS)([]) == 0
+    assert (store.hits, store.misses) == (2, 2)
+    assert store.memoize(q1_brute, content_hash="abc", version=1, operations=Q2_OPERATORS)([]) == 0
+    assert (store.hits, store.misses) == (2, 3)
+
+
+def test_evict(tmp_path):
+    store = ResultStore(path=tmp_path / "results.sqlite", max_bytes=1 << 20)
+    for i in range(3):
+        store.put(f"key{i}", "f", 10**40 + i)
+        time.sleep(0.01)
+    assert len(store) == 3
+    store.get("key0")
+    # room for two entries, key1 is the least recently used
+    store.max_bytes = 2 * (len("key0") + len("f") + len(str(10**40)))
+    assert store.evict() == 1
+    assert store.get("key1") == (False, None)
+    assert store.get("key0") == (True, 10**40)
+    store.max_age_s = 0
+    assert store.evict() == 2
+
+
+def test_put_evicts_above_max_bytes(tmp_path):
+    store = ResultStore(path=tmp_path / "results.sqlite", max_bytes=2 * (len("key0") + len("f") + len(str(10**40))))
+    for i in range(3):
+        store.put(f"key{i}", "f", 10**40 + i)
+        time.sleep(0.01)
+    assert len(store) == 2
+    assert store.get("key0") == (False, None)
+
+
+def test_run_with_memo(tmp_path):
+    store = ResultStore(path=tmp_path / "results.sqlite")
+    first = run([1, 8], input_name="small_ex.txt", memo=store)
+    second = run([1, 8], repeat=2, input_name="small_ex.txt", memo=store)
+    assert [report.answers for report in first] == [report.answers for report in second]
+    assert [report.memo_hits for report in first] == [0, 0]
+    assert [report.memo_hits for report in second] == [4, 4]
+
+
+def test_run_day_params(tmp_path):
+    store = ResultStore(path=tmp_path / "results.sqlite")
+    day = DAYS[7]
+    filename = day.input_file("small_ex.txt")
+    assert run_day(day, filename, memo=store).answers == {"part_1": 3749, "part_2": 11387}
+    # part 1 with the operators of part 2 is not answered from the default part 1
+    day = dataclasses.replace(day, part_1_params={"operations": Q2_OPERATORS})
+    for _ in range(2):
+        assert run_day(day, filename, memo=store).answers == {"part_1": 11387, "part_2": 11387}
+        assert run_day(day, filename).answers["part_1"] == 11387
+    assert (store.hits, store.misses) == (3, 3)
@@ -0,0 +1,47 @@
+import io
+
+from aoc.profiling import Profiler
+from aoc.runner import run
+
+
+def test_disabled(tmp_path):
+    profiler = Profiler(enabled=False, output_dir=tmp_path)
+    with profiler.phase("nothing"):
+        sum(range(10))
+    profiler.report()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_run_profiled(tmp_path):
+    stream = io.StringIO()
+    profiler = Profiler(output_dir=tmp_path, top=5, memory=True, stream=stream)
+    run([1], repeat=2, input_name="small_ex.txt", profiler=profiler)
+    assert set(profiler.allocations) == {"day_01_parse", "day_01_part_1", "day_01_part_2"}
+    for name in profiler.allocations:
+        top = profiler.top_allocations(name)
+        assert 0 < len(top) <= 5
+        assert all(stat.size_diff or stat.count_diff for stat in top)
+        sizes = [abs(stat.size_diff) for stat in top]
+        assert sizes == sorted(sizes, reverse=True)
+    profiler.report()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "day_01_parse.prof",
+        "day_01_part_1.prof",
+        "day_01_part_2.prof",
+    ]
+    report = stream.getvalue()
+    assert "q1_distance" in report
+    assert "allocation sites" in report
+
+
+def test_phase_accumulates_allocations(tmp_path):
+    profiler = Profiler(output_dir=tmp_path, memory=True, stream=io.StringIO())
+    kept = []
+    for _ in range(3):
+        with profiler.phase("alloc"):
+            kept.append(bytearray(1_000_000))
+    (site,) = [stat for stat in profiler.allocations["alloc"].values() if stat.size_diff >= 1_000_000]
+    assert 3_000_000 <= site.size_diff < 3_100_000
+    assert site.count_diff >= 3
+    assert site.size >= 1_000_000
+    assert profiler.top_allocations("alloc")[0] is site
@@ -0,0 +1,56 @@
+import pytest
+
+from aoc.reader import blocks, lines, mapped, parse_ints
+
+
+def test_lines():
+    data = b"ab\r\n\ncd\nef"
+    assert [bytes(line) for line in lines(data)] == [b"ab", b"cd", b"ef"]
+    assert [bytes(line) for line in lines(data, keep_empty=True)] == [b"ab", b"", b"cd", b"ef"]
+
+
+def test_mapped(tmp_path):
+    filename = tmp_path / "input.txt"
+    filename.write_bytes(b"1 2\n3 4\n")
+    with mapped(filename) as data:
+        assert [parse_ints(line) for line in lines(data)] == [[1, 2], [3, 4]]
+    filename.write_bytes(b"")
+    with mapped(filename) as data:
+        assert data == b""
+        assert list(lines(data)) == []
+
+
+def test_views_released(tmp_path):
+    filename = tmp_path / "input.txt"
+    filename.write_bytes(b"ab\ncd\n")
+    with mapped(filename) as data:
+        for line in lines(data):
+            pass
+        for block in blocks(data, size=3):
+            pass
+    # the loop variables outlive the map, released
+    with pytest.raises(ValueError):
+        bytes(line)
+    with pytest.raises(ValueError):
+        bytes(block)
+    # a view still in use is not hidden
+    with pytest.raises(BufferError):
+        with mapped(filename) as data:
+            in_use = lines(data)
+            next(in_use)
+    in_use.close()
+
+
+def test_blocks():
+    assert [bytes(block) for block in blocks(b"abcde", size=2)] == [b"ab", b"cd", b"e"]
+    assert list(blocks(b"")) == []
+    data = b"ab\ncd\nef"
+    assert [bytes(block) for block in blocks(data, size=4, whole_lines=True)] == [b"ab\ncd\n", b"ef"]
+    assert [bytes(block) for block in blocks(data, size=3, whole_lines=True)] == [b"ab\n", b"cd\n", b"ef"]
+    assert [bytes(block) for block in blocks(b"abcdef", size=2, whole_lines=True)] == [b"abcdef"]
+
+
+def test_parse_ints():
+    assert parse_ints(b"190: 10 19") == [190, 10, 19]
+    assert parse_ints(memoryview(b"75,47,-61")) == [75, 47, -61]
+    assert parse_ints(b"") == []
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+from aoc import runner
+from aoc.__main__ import main
+from aoc.days import DAYS, parse_days
+from aoc.runner import PhaseTiming, run, run_parallel, to_json
+
+
+def test_parse_days():
+    assert parse_days("1-3,7") == [1, 2, 3, 7]
+    assert parse_days("2,2") == [2]
+    with pytest.raises(ValueError):
+        parse_days("30")
+
+
+@pytest.mark.parametrize("day", sorted(DAYS.keys()))
+def test_load_solvers(day):
+    solver = DAYS[day].load()
+    assert callable(solver.parse) and callable(solver.part_1) and callable(solver.part_2)
+
+
+def test_phase_timing():
+    timing = PhaseTiming(runs_ns=[5, 1, 3, 2, 4])
+    assert timing.min_ns == 1
+    assert timing.median_ns == 3
+    assert timing.p95_ns == 5
+
+
+def test_run_small_ex():
+    reports = run([1, 2], repeat=2, input_name="small_ex.txt")
+    assert [report.answers for report in reports] == [
+        {"part_1": 11, "part_2": 31},
+        {"part_1": 2, "part_2": 4},
+    ]
+    data = to_json(reports, repeat=2)
+    assert len(data["days"][0]["phases"]["parse"]["runs_ns"]) == 2
+
+
+def test_main_json(tmp_path):
+    output = tmp_path / "report.json"
+    main(["run", "--days", "8", "--input-name", "small_ex.txt", "--no-cache", "--json", str(output)])
+    data = json.loads(output.read_text())
+    assert data["days"][0]["answers"] == {"part_1": 14, "part_2": 34}
+    assert set(data["days"][0]["phases"]) == {"parse", "part_1", "part_2"}
+
+
+def test_run_parallel():
+    reports = run_parallel([1, 2, 6], max_workers=2, timeout=0.5, input_name="small_ex.txt", stats=True)
+    assert [report.day for report in reports] == [1, 2, 6]
+    assert [report.answers for report in reports[:2]] == [
+        {"part_1": 11, "part_2": 31},
+        {"part_1": 2, "part_2": 4},
+    ]
+    assert all((report.peak_rss_kb > 0 and report.error is None for report in reports))
+    assert reports[2].counters["part_1"]["day_06.guard_steps"] > 0
+
+
+def test_run_parallel_log_level(capfd):
+    run_parallel([1], input_name="small_ex.txt", log_level="info")
+    assert "Loading" in capfd.readouterr().err
+    run_parallel([1], input_name="small_ex.txt", log_level="warning")
+    assert "Loading" not in capfd.readouterr().err
+
+
+def _exit_worker(day_number, filename, **kwargs):
+    """Stands for a worker killed while running its day"""
+    os._exit(1)
+
+
+def test_run_parallel_broken_pool(monkeypatch):
+    monkeypatch.setattr(runner, "_run_day_isolated", _exit_worker)
+    reports = run_parallel([1, 2], input_name="small_ex.txt")
+    assert [report.day for report in reports] == [1, 2]
+    assert all(("BrokenProcessPool" in report.error for report in reports))
+
+
+def test_run_parallel_timeout():
+    # part 2 of day 6 takes seconds on the real input
+    (report,) = run_parallel([6], timeout=0.2)
+    assert report.error == "timed out after 0.2s"
+    assert report.answers == {}
@@ -0,0 +1,56 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from aoc.grid import Grid
+from aoc.shared import attach, attached_grid, publish, publish_grid
+
+
+def _sum_numbers(handle) -> int:
+    with attach(handle) as views:
+        return sum(views["numbers"])
+
+
+def _crash(handle):
+    with attach(handle):
+        os._exit(1)
+
+
+def test_publish_attach():
+    buffers = {"bytes": b"abc", "numbers": array("q", [1, -2, 1 << 40]), "floats": array("d", [0.5])}
+    with publish(buffers, meta={"n": 3}) as handle:
+        with attach(handle) as views:
+            assert bytes(views["bytes"]) == b"abc"
+            assert views["numbers"].tolist() == [1, -2, 1 << 40]
+            assert views["floats"][0] == 0.5
+            with pytest.raises(TypeError):
+                views["numbers"][0] = 5
+        assert handle.meta == {"n": 3}
+    with pytest.raises(FileNotFoundError):
+        with attach(handle):
+            pass
+
+
+def test_workers():
+    with publish({"numbers": array("q", range(100))}) as handle, ProcessPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(_sum_numbers, [handle] * 3)) == [4950] * 3
+
+
+def test_cleanup_on_worker_crash():
+    with pytest.raises(BrokenProcessPool):
+        with publish({"numbers": array("q", range(10))}) as handle, ProcessPoolExecutor(max_workers=1) as executor:
+            executor.submit(_crash, handle).result()
+    with pytest.raises(FileNotFoundError):
+        with attach(handle):
+            pass
+
+
+def test_grid():
+    grid = Grid.from_lines([b"#.", b".#"])
+    with publish_grid(grid) as handle, attach(handle) as views:
+        shared = attached_grid(handle, views)
+        assert (shared.width, shared.height) == (2, 2)
+        assert shared[shared.index(1, 1)] == ord("#")
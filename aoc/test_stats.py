@@ -0,0 +1,47 @@
+from aoc.days import DAYS
+from aoc.runner import run
+from aoc.stats import COUNTERS, counting
+from day_06.compute import GridMap
+
+
+def test_collect_nested():
+    assert not COUNTERS.enabled
+    with COUNTERS.collect() as outer:
+        COUNTERS.add("a")
+        with COUNTERS.collect() as inner:
+            COUNTERS.add("a", 2)
+        assert inner == {"a": 2}
+    assert outer == {"a": 3}
+    assert not COUNTERS.enabled
+    assert "a" not in COUNTERS.values
+
+
+def test_run_counters():
+    reports = run([4, 5, 6, 7, 9], input_name="small_ex.txt", stats=True)
+    counters = {report.day: report.counters for report in reports}
+    assert counters[4]["part_1"]["day_04.is_in_word"] > 0
+    assert counters[5]["part_2"] == {} and counters[5]["parse"]["day_05.graph_passes"] > 0
+    assert counters[6]["part_1"]["day_06.guard_steps"] >= counters[6]["part_1"]["day_06.loop_checks"] >= 40
+    assert counters[7]["part_1"]["day_07.operator_evaluations"] > 0
+    assert counters[9]["part_2"]["day_09.first_free_space"] > 0
+    assert run([4], input_name="small_ex.txt")[0].counters == {}
+
+
+def test_counting(capsys):
+    with counting(False):
+        COUNTERS.add("a")
+    assert capsys.readouterr().out == ""
+    COUNTERS.reset()
+    with counting(True):
+        COUNTERS.add("a", 3)
+    COUNTERS.enabled = False
+    COUNTERS.reset()
+    assert capsys.readouterr().out.split() == ["a", "3"]
+
+
+def test_grid_walk_counters():
+    grid_map = GridMap.from_file(DAYS[6].input_file("small_ex.txt"))
+    with COUNTERS.collect() as counters:
+        visited = grid_map.predict_guard()
+    # one step per visited (cell, facing) plus the turns in place
+    assert counters["day_06.grid_steps"] >= visited == 41
@@ -0,0 +1,14 @@
+import io
+
+from aoc.writer import BufferedSink
+
+
+def test_buffered_sink():
+    fout = io.BytesIO()
+    with BufferedSink(fout, flush_size=4) as sink:
+        sink.write(b"abc")
+        assert fout.getvalue() == b""
+        sink.write(b"de")
+        assert fout.getvalue() == b"abcde"
+        sink.write(b"f")
+    assert fout.getvalue() == b"abcdef"
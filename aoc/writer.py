@@ -0,0 +1,25 @@
+from typing import BinaryIO, Self
+
+
+class BufferedSink:
+    """Collects small writes in one reusable buffer, written out once it holds flush_size bytes"""
+
+    def __init__(self, fout: BinaryIO, *, flush_size: int = 1 << 20):
+        self.fout = fout
+        self.flush_size = flush_size
+        self.buffer = bytearray()
+
+    def write(self, data: bytes | bytearray) -> None:
+        self.buffer += data
+        if len(self.buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self.fout.write(self.buffer)
+        del self.buffer[:]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
@@ -1,10 +1,15 @@
 import dataclasses
-import re
 from argparse import ArgumentParser
 from collections import defaultdict
 from pathlib import Path
 from typing import Self
 
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import blocks, mapped, parse_ints
+
+logger = get_logger("day_01")
+
 
 @dataclasses.dataclass(kw_only=True, frozen=True)
 class ListData:
@@ -14,14 +19,15 @@ class ListData:
     @classmethod
     def from_file(cls, filename: Path | str) -> Self:
         obj = cls(list_a=[], list_b=[])
-        print(f"Loading {filename}")
-        pattern = re.compile(r"(\d+)\s+(\d+)")
-        with open(filename, "r") as fin:
-            for line in fin:
-                if match := pattern.match(line):
-                    a_str, b_str = match.groups()
-                    obj.list_a.append(int(a_str))
-                    obj.list_b.append(int(b_str))
+        logger.info("Loading %s", filename)
+        with mapped(filename) as data:
+            # a block of lines at a time, rather than the whole file or each line
+            for block in blocks(data, whole_lines=True):
+                values = parse_ints(block)
+                if len(values) % 2:
+                    raise ValueError(f"{filename} has an odd number of values")
+                obj.list_a.extend(values[0::2])
+                obj.list_b.extend(values[1::2])
         return obj
 
 
@@ -45,18 +51,26 @@ def q2_similarity(list_data: ListData) -> int:
     return total_similarity
 
 
-def main(filename: str):
-    list_data = ListData.from_file(filename)
-    first = q1_distance(list_data)
+def main(filename: str, profiler: Profiler):
+    with profiler.phase("day_01_parse"):
+        list_data = ListData.from_file(filename)
+    with profiler.phase("day_01_part_1"):
+        first = q1_distance(list_data)
     print(f"Q1: total distance: {first}")
-    second = q2_similarity(list_data)
+    with profiler.phase("day_01_part_2"):
+        second = q2_similarity(list_data)
     print(f"Q2: similarity: {second}")
+    profiler.report()
 
 
 if __name__ == "__main__":
     fd = Path(__file__).parent.absolute() / "input.txt"
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
     args = parser.parse_args()
 
-    main(args.input)
+    configure_logging(args.log_level)
+
+    main(args.input, Profiler.from_args(args))
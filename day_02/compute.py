@@ -3,6 +3,12 @@ from argparse import ArgumentParser
 from pathlib import Path
 from typing import Self, ClassVar
 
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import mapped, lines, parse_ints
+
+logger = get_logger("day_02")
+
 
 class UnsafeDifference(ValueError):
     def __init__(self, *, index: int, message: str):
@@ -20,13 +26,11 @@ class Report:
     @classmethod
     def from_file(cls, filename: Path | str) -> list[Self]:
         loaded = []
-        print(f"Loading {filename}")
-        with open(filename, "r") as fin:
-            for line in fin:
-                line = line.strip()
-                if not line:
-                    continue
-                loaded.append(cls(data=list(map(int, line.split(" ")))))
+        logger.info("Loading %s", filename)
+        with mapped(filename) as data:
+            for line in lines(data):
+                if values := parse_ints(line):
+                    loaded.append(cls(data=values))
         return loaded
 
     MIN_DIFF: ClassVar[int] = 1
@@ -79,25 +83,33 @@ def q2_remove_safe(data: list[Report]) -> int:
                     total_safe += 1
                     break
             else:
-                print(f"Report at {line=} is unsafe {e}")
+                logger.debug("Report at line=%s is unsafe %s", line, e)
 
         else:
             total_safe += 1
     return total_safe
 
 
-def main(filename: str):
-    all_reports = Report.from_file(filename)
-    q1 = q1_count_safe(all_reports)
+def main(filename: str, profiler: Profiler):
+    with profiler.phase("day_02_parse"):
+        all_reports = Report.from_file(filename)
+    with profiler.phase("day_02_part_1"):
+        q1 = q1_count_safe(all_reports)
     print(f"Q1: {q1} safe reports found")
-    q2 = q2_remove_safe(all_reports)
+    with profiler.phase("day_02_part_2"):
+        q2 = q2_remove_safe(all_reports)
     print(f"Q1: {q2} safe reports found with dampener")
+    profiler.report()
 
 
 if __name__ == "__main__":
     fd = Path(__file__).parent.absolute() / "input.txt"
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
     args = parser.parse_args()
 
-    main(args.input)
+    configure_logging(args.log_level)
+
+    main(args.input, Profiler.from_args(args))
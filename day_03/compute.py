@@ -4,6 +4,12 @@ from argparse import ArgumentParser
 from pathlib import Path
 from typing import Self
 
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import mapped
+
+logger = get_logger("day_03")
+
 
 @dataclasses.dataclass(kw_only=True, frozen=True)
 class Mult:
@@ -39,26 +45,24 @@ class Mult:
             if start < offset < end:
                 return activation_block[start]
             start = end
-        print(f"{offset=} is_active={activation_block[start]}")
+        logger.debug("offset=%s is_active=%s", offset, activation_block[start])
         return activation_block[start]
 
     @classmethod
     def from_file(cls, filename: Path | str) -> list[Self]:
-        lines = ""
-        print(f"Loading {filename}")
-        with open(filename, "r") as fin:
-            for line in fin:
-                lines += line
+        logger.info("Loading %s", filename)
+        with mapped(filename) as data:
+            lines = str(data, "ascii")
 
         activation_block = cls._build_activation_block(lines)
-        print(f"  built {activation_block=}")
+        logger.debug("  built activation_block=%s", activation_block)
 
         op_pattern = re.compile(r"mul\((\d{1,3}),(\d{1,3})\)")
         operations = []
         start = 0
         while (next_mul := lines.find("mul(", start)) > 0:
             is_active = cls._mult_is_active(next_mul, activation_block)
-            if match := op_pattern.match(lines[next_mul:]):
+            if match := op_pattern.match(lines, next_mul):
                 operations.append(cls(first=int(match.group(1)), second=int(match.group(2)), is_active=is_active))
 
             start = next_mul + 4
@@ -74,18 +78,26 @@ def q2_active_mult(data: list[Mult]) -> int:
     return sum((op.value() for op in data if op.is_active))
 
 
-def main(filename: str):
-    operations = Mult.from_file(filename)
-    q1 = q1_lazy_mult(operations)
+def main(filename: str, profiler: Profiler):
+    with profiler.phase("day_03_parse"):
+        operations = Mult.from_file(filename)
+    with profiler.phase("day_03_part_1"):
+        q1 = q1_lazy_mult(operations)
     print(f"Q1: lazy mult {q1}")
-    q2 = q2_active_mult(operations)
+    with profiler.phase("day_03_part_2"):
+        q2 = q2_active_mult(operations)
     print(f"Q2: active mult {q2}")
+    profiler.report()
 
 
 if __name__ == "__main__":
     fd = Path(__file__).parent.absolute() / "input.txt"
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
     args = parser.parse_args()
 
-    main(args.input)
+    configure_logging(args.log_level)
+
+    main(args.input, Profiler.from_args(args))
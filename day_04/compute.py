@@ -1,9 +1,18 @@
 import dataclasses
+import logging
 from argparse import ArgumentParser
 from collections import defaultdict
 from pathlib import Path
 from typing import Self
 
+from aoc.grid import Grid, DIRECTIONS_8, DIAGONALS
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import mapped, lines
+from aoc.stats import COUNTERS, add_stats_arguments, counting
+
+logger = get_logger("day_04")
+
 
 @dataclasses.dataclass(frozen=True)
 class Position:
@@ -40,16 +49,12 @@ class Card:
 
     @classmethod
     def from_file(cls, filename: Path | str) -> Self:
-        print(f"Loading {filename}")
+        logger.info("Loading %s", filename)
 
-        with open(filename, "r") as fin:
-            obj = cls()
-            for y, line in enumerate(fin):
-                line = line.strip()
-                if not line:
-                    continue
-
-                for x, char in enumerate(line):
+        obj = cls()
+        with mapped(filename) as data:
+            for y, line in enumerate(lines(data)):
+                for x, char in enumerate(str(line, "ascii").strip()):
                     p = Position(x, y)
                     obj.map[p] = char
                     obj.rev_map[char].add(p)
@@ -57,6 +62,8 @@ class Card:
         return obj
 
     def is_in_word(self, word: str, *, i: int, pos: Position, vect: Position) -> bool:
+        if COUNTERS.enabled:
+            COUNTERS.add("day_04.is_in_word")
         current_letter = word[i]
         if pos not in self.rev_map[current_letter]:
             return False
@@ -103,8 +110,15 @@ class Card:
         right_word = word[middle_idx:]
 
         found = []
+        debug = logger.isEnabledFor(logging.DEBUG)
         for middle_position in self.rev_map[word[middle_idx]]:
-            print(f"Looking for {left_word=} {right_word=} from {middle_position=}")
+            if debug:
+                logger.debug(
+                    "Looking for left_word=%s right_word=%s from middle_position=%s",
+                    left_word,
+                    right_word,
+                    middle_position,
+                )
             if self.is_cross(left_word, right_word, pos=middle_position):
                 found.append(middle_position)
         return found
@@ -118,18 +132,75 @@ def q2_find_x_mas(card: Card) -> int:
     return len(card.search_x("MAS"))
 
 
-def main(filename: str):
-    data = Card.from_file(filename)
-    q1 = q1_find_xmas(data)
+def load_grid(filename: Path | str) -> Grid:
+    logger.info("Loading %s", filename)
+    # XMAS reads 3 cells away from its start
+    return Grid.from_file(filename, padding=3)
+
+
+def search_grid(grid: Grid, word: str) -> int:
+    """Same count as Card.search, walking flat offsets"""
+    cells = grid.cells
+    letters = word.encode()
+    found = 0
+    for delta in grid.deltas(DIRECTIONS_8):
+        for start in grid.find_all(letters[:1]):
+            if all((cells[start + i * delta] == letter for i, letter in enumerate(letters[1:], start=1))):
+                found += 1
+    return found
+
+
+def search_x_grid(grid: Grid, word: str = "MAS") -> int:
+    """Same count as Card.search_x for 3 letter words"""
+    if len(word) != 3:
+        raise ValueError("Only 3 letters words are supported")
+    first, middle, last = word.encode()
+    cells = grid.cells
+    top_left, top_right, bottom_right, bottom_left = grid.deltas(DIAGONALS)
+    found = 0
+    for pos in grid.find_all(bytes([middle])):
+        a, b = cells[pos + top_left], cells[pos + bottom_right]
+        c, d = cells[pos + top_right], cells[pos + bottom_left]
+        if {a, b} == {first, last} and {c, d} == {first, last}:
+            found += 1
+    return found
+
+
+def q1_find_xmas_grid(grid: Grid) -> int:
+    return search_grid(grid, "XMAS")
+
+
+def q2_find_x_mas_grid(grid: Grid) -> int:
+    return search_x_grid(grid, "MAS")
+
+
+def main(filename: str, use_grid: bool, profiler: Profiler):
+    if use_grid:
+        parse, part_1, part_2 = load_grid, q1_find_xmas_grid, q2_find_x_mas_grid
+    else:
+        parse, part_1, part_2 = Card.from_file, q1_find_xmas, q2_find_x_mas
+    with profiler.phase("day_04_parse"):
+        data = parse(filename)
+    with profiler.phase("day_04_part_1"):
+        q1 = part_1(data)
     print(f"Q1: {q1} XMAS")
-    q2 = q2_find_x_mas(data)
+    with profiler.phase("day_04_part_2"):
+        q2 = part_2(data)
     print(f"Q2: {q2} X-MAS")
+    profiler.report()
 
 
 if __name__ == "__main__":
     fd = Path(__file__).parent.absolute() / "input.txt"
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
+    parser.add_argument("--grid", action="store_true", help="Use the flat grid solver")
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
+    add_stats_arguments(parser)
     args = parser.parse_args()
 
-    main(args.input)
+    configure_logging(args.log_level)
+
+    with counting(args.stats):
+        main(args.input, args.grid, Profiler.from_args(args))
@@ -2,7 +2,7 @@ from pathlib import Path
 
 import pytest
 
-from day_04.compute import Card, q1_find_xmas, q2_find_x_mas
+from day_04.compute import Card, q1_find_xmas, q2_find_x_mas, load_grid, q1_find_xmas_grid, q2_find_x_mas_grid
 
 
 @pytest.fixture(scope="session")
@@ -29,3 +29,10 @@ def test_q1(input_txt):
 
 def test_q2(input_txt):
     assert q2_find_x_mas(input_txt) == 1871
+
+
+@pytest.mark.parametrize("filename, q1, q2", [("small_ex.txt", 18, 9), ("input.txt", 2414, 1871)])
+def test_grid(filename, q1, q2):
+    grid = load_grid(Path(__file__).parent.absolute() / filename)
+    assert q1_find_xmas_grid(grid) == q1
+    assert q2_find_x_mas_grid(grid) == q2
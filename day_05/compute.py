@@ -6,6 +6,13 @@ from copy import copy
 from pathlib import Path
 from typing import Self, ClassVar
 
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import mapped, lines
+from aoc.stats import COUNTERS, add_stats_arguments, counting
+
+logger = get_logger("day_05")
+
 
 @dataclasses.dataclass(kw_only=True, frozen=True)
 class Rule:
@@ -67,7 +74,9 @@ class Node:
         pending = copy(graph)
         result = [p for p in pages if p not in pending]
 
+        passes = 0
         while pending:
+            passes += 1
             to_insert = []
             for node in pending.values():
                 if not any((second.page in pending for second in node.prev_nodes)):
@@ -78,6 +87,9 @@ class Node:
                 pending.pop(page)
                 result.append(page)
 
+        if COUNTERS.enabled:
+            COUNTERS.add("day_05.generate_order")
+            COUNTERS.add("day_05.graph_passes", passes)
         return result
 
 
@@ -122,7 +134,7 @@ class SetOfRules:
         return True
 
     def _graph_reorder_pages(self, pages: list[int], active_rules: RuleMap) -> list[int]:
-        print(f"Graph attempt to reorder {pages=} using {active_rules}")
+        logger.debug("Graph attempt to reorder pages=%s using %s", pages, active_rules)
         graph = Node.build_graph(active_rules)
         result = Node.generate_order(pages, graph)
         if not self._check_valid_update(*self._find_rules(result)):
@@ -144,10 +156,10 @@ class SetOfRules:
     def from_file(cls, filename: Path | str) -> Self:
         obj = cls()
 
-        print(f"Loading {filename}")
-        with open(filename, "r") as fin:
-            for line in fin:
-                line = line.strip()
+        logger.info("Loading %s", filename)
+        with mapped(filename) as data:
+            for line in lines(data):
+                line = str(line, "ascii").strip()
                 if not line:
                     continue
 
@@ -165,18 +177,28 @@ def q2_reordered_middle_page(data: SetOfRules) -> int:
     return sum((update.middle_page for update in data.updates if update.was_reordered))
 
 
-def main(filename: str):
-    data = SetOfRules.from_file(filename)
-    q1 = q1_middle_page(data)
+def main(filename: str, profiler: Profiler):
+    with profiler.phase("day_05_parse"):
+        data = SetOfRules.from_file(filename)
+    with profiler.phase("day_05_part_1"):
+        q1 = q1_middle_page(data)
     print(f"Q1: {q1} middle page checksum")
-    q2 = q2_reordered_middle_page(data)
+    with profiler.phase("day_05_part_2"):
+        q2 = q2_reordered_middle_page(data)
     print(f"Q2: {q2} after reordered middle page checksum")
+    profiler.report()
 
 
 if __name__ == "__main__":
     fd = Path(__file__).parent.absolute() / "input.txt"
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
+    add_stats_arguments(parser)
     args = parser.parse_args()
 
-    main(args.input)
+    configure_logging(args.log_level)
+
+    with counting(args.stats):
+        main(args.input, Profiler.from_args(args))
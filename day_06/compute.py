@@ -1,9 +1,22 @@
 import dataclasses
+import logging
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 from enum import Enum
+from functools import partial
+from itertools import repeat
 from pathlib import Path
-from typing import Self, ClassVar
+from typing import Self, ClassVar, Iterable, Iterator
+
+from aoc.grid import Grid, DIRECTIONS_4, OUTSIDE
+from aoc.shared import SharedSegment, attach, attached_grid, publish_grid
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import mapped, lines
+from aoc.stats import COUNTERS, add_stats_arguments, counting
+
+logger = get_logger("day_06")
 
 
 class Looping(Exception):
@@ -12,6 +25,14 @@ class Looping(Exception):
         super().__init__("Guard round is looping")
 
 
+def _count_guard_walk(guard_path: list["Position"], *, left_map: bool):
+    """Counted once per walk from its path, so that the walk loop itself is not instrumented"""
+    # every move appends to the path, except the last one when it leaves the map
+    COUNTERS.add("day_06.guard_steps", len(guard_path) - 1 + left_map)
+    # one check per new location
+    COUNTERS.add("day_06.loop_checks", len(guard_path) - 1)
+
+
 @dataclasses.dataclass(frozen=True)
 class Position:
     x: int
@@ -84,17 +105,14 @@ class Map:
 
     @classmethod
     def from_file(cls, filename: Path | str) -> Self:
-        print(f"Loading {filename}")
+        logger.info("Loading %s", filename)
         obstacles = set()
         guard = None
-        with open(filename, "r") as fin:
+        with mapped(filename) as data:
             y = 0
-            for y, line in enumerate(fin):
-                line = line.replace("\n", "")
-                if not line:
-                    continue
+            for y, line in enumerate(lines(data)):
                 x = 0
-                for x, char in enumerate(line):
+                for x, char in enumerate(str(line, "ascii")):
                     match char:
                         case cls.EMPTY:
                             continue
@@ -107,7 +125,7 @@ class Map:
                             )
         if guard is None:
             raise ValueError("Did not find the guard")
-        print(f"Loaded a grid of {x + 1}x{y + 1}")
+        logger.info("Loaded a grid of %dx%d", x + 1, y + 1)
         return cls(
             width=x + 1,
             height=y + 1,
@@ -130,6 +148,8 @@ class Map:
                 guard_path.append(current_guard.location)
                 current_key = current_guard.key()
                 if current_key in visited:
+                    if COUNTERS.enabled:
+                        _count_guard_walk(guard_path, left_map=False)
                     raise Looping(guard_path)
                 visited.add(current_key)
 
@@ -139,12 +159,16 @@ class Map:
             else:
                 current_guard.location = next_position
 
+        if COUNTERS.enabled:
+            _count_guard_walk(guard_path, left_map=True)
         return set(guard_path)
 
     def brute_force_obstructions(self, attempts: set[Position]) -> int:
         count = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
         for position in attempts:
-            print(f"Attempt at {position}")
+            if debug:
+                logger.debug("Attempt at %s", position)
             if position == self.guard.location:
                 continue
             try:
@@ -156,19 +180,160 @@ class Map:
         return count
 
 
-def main(filename: str):
-    map = Map.from_file(filename)
-    q1_visited = map.predict_guard()
-    q1 = len(q1_visited)
+@dataclasses.dataclass(kw_only=True)
+class GridMap:
+    """Same map on a flat grid, the guard facing is an index in DIRECTIONS_4"""
+
+    EMPTY: ClassVar = ord(".")
+    OBSTACLE: ClassVar = ord("#")
+
+    grid: Grid
+    guard: int
+    facing: int
+
+    @classmethod
+    def from_file(cls, filename: Path | str) -> Self:
+        logger.info("Loading %s", filename)
+        grid = Grid.from_file(filename)
+        for facing, char in enumerate(b"^>v<"):
+            if (guard := grid.cells.find(char)) >= 0:
+                grid[guard] = cls.EMPTY
+                logger.info("Loaded a grid of %dx%d", grid.width, grid.height)
+                return cls(grid=grid, guard=guard, facing=facing)
+        raise ValueError("Did not find the guard")
+
+    def _walk(self, idx: int, facing: int, seen: bytearray, *, obstacle: int = -1) -> bool:
+        """Marks one bit per facing in seen, False when the guard loops; obstacle adds one, cells are only read"""
+        cells = self.grid.cells
+        deltas = self.grid.deltas(DIRECTIONS_4)
+        while True:
+            bit = 1 << facing
+            if seen[idx] & bit:
+                escaped = False
+                break
+            seen[idx] |= bit
+            next_idx = idx + deltas[facing]
+            next_cell = cells[next_idx]
+            if next_cell == OUTSIDE:
+                escaped = True
+                break
+            if next_cell == self.OBSTACLE or next_idx == obstacle:
+                facing = (facing + 1) % 4
+            else:
+                idx = next_idx
+        if COUNTERS.enabled:
+            # seen starts empty: one step per bit set, plus the one finding the loop; every step is also a loop check
+            COUNTERS.add("day_06.grid_steps", int.from_bytes(seen, "little").bit_count() + (not escaped))
+        return escaped
+
+    def predict_guard(self) -> int:
+        """Number of visited positions"""
+        seen = bytearray(len(self.grid.cells))
+        if not self._walk(self.guard, self.facing, seen):
+            raise Looping([])
+        return len(seen) - seen.count(0)
+
+    def _candidates(self) -> Iterator[tuple[int, int, int]]:
+        """(position, facing, obstacle) for each position of the path, from the state just before it was first reached"""
+        cells = self.grid.cells
+        deltas = self.grid.deltas(DIRECTIONS_4)
+        tried = bytearray(len(cells))
+        tried[self.guard] = 1
+        idx, facing = self.guard, self.facing
+        while True:
+            next_idx = idx + deltas[facing]
+            next_cell = cells[next_idx]
+            if next_cell == OUTSIDE:
+                return
+            if next_cell == self.OBSTACLE:
+                facing = (facing + 1) % 4
+                continue
+            if not tried[next_idx]:
+                tried[next_idx] = 1
+                yield idx, facing, next_idx
+            idx = next_idx
+
+    def count_loops(self, candidates: Iterable[tuple[int, int, int]]) -> int:
+        size = len(self.grid.cells)
+        return sum(
+            (
+                1
+                for idx, facing, obstacle in candidates
+                if not self._walk(idx, facing, bytearray(size), obstacle=obstacle)
+            )
+        )
+
+    def count_obstructions(self) -> int:
+        """Try an obstacle on each position of the path"""
+        return self.count_loops(self._candidates())
+
+    def count_obstructions_parallel(self, *, max_workers: int | None = None, chunk_size: int = 256) -> int:
+        """count_obstructions over a process pool, the grid is published once in shared memory"""
+        candidates = list(self._candidates())
+        chunks = [candidates[i : i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+        with publish_grid(self.grid) as handle, ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return sum(executor.map(_count_loops_shared, repeat(handle), chunks))
+
+
+def _count_loops_shared(handle: SharedSegment, candidates: list[tuple[int, int, int]]) -> int:
+    with attach(handle) as views:
+        # the guard is not needed to walk from the candidates
+        return GridMap(grid=attached_grid(handle, views), guard=-1, facing=-1).count_loops(candidates)
+
+
+def q1_visited_grid(map: GridMap) -> int:
+    return map.predict_guard()
+
+
+def q2_obstructions_grid(map: GridMap) -> int:
+    return map.count_obstructions()
+
+
+def q2_obstructions_parallel(map: GridMap, *, max_workers: int | None = None) -> int:
+    return map.count_obstructions_parallel(max_workers=max_workers)
+
+
+def q1_visited(map: Map) -> int:
+    return len(map.predict_guard())
+
+
+def q2_obstructions(map: Map) -> int:
+    return map.brute_force_obstructions(map.predict_guard())
+
+
+def main(filename: str, use_grid: bool, workers: int | None, profiler: Profiler):
+    if workers is not None:
+        parse, part_1 = GridMap.from_file, q1_visited_grid
+        part_2 = partial(q2_obstructions_parallel, max_workers=workers or None)
+    elif use_grid:
+        parse, part_1, part_2 = GridMap.from_file, q1_visited_grid, q2_obstructions_grid
+    else:
+        parse, part_1, part_2 = Map.from_file, q1_visited, q2_obstructions
+    with profiler.phase("day_06_parse"):
+        map = parse(filename)
+    with profiler.phase("day_06_part_1"):
+        q1 = part_1(map)
     print(f"Q1: the guard visited {q1} locations")
-    q2 = map.brute_force_obstructions(q1_visited)
+    with profiler.phase("day_06_part_2"):
+        q2 = part_2(map)
     print(f"Q2: {q2} obstructions possible")
+    profiler.report()
 
 
 if __name__ == "__main__":
     fd = Path(__file__).parent.absolute() / "input.txt"
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
+    parser.add_argument("--grid", action="store_true", help="Use the flat grid solver")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="Solve Q2 on the grid with a process pool (0 means one per CPU)"
+    )
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
+    add_stats_arguments(parser)
     args = parser.parse_args()
 
-    main(args.input)
+    configure_logging(args.log_level)
+
+    with counting(args.stats):
+        main(args.input, args.grid, args.workers, Profiler.from_args(args))
@@ -2,7 +2,7 @@ from pathlib import Path
 
 import pytest
 
-from day_06.compute import Map
+from day_06.compute import Map, GridMap
 
 
 @pytest.fixture(scope="session")
@@ -33,3 +33,15 @@ def test_q1_input(input_txt):
 def test_q2_input(input_txt):
     visited = input_txt.predict_guard()
     assert input_txt.brute_force_obstructions(visited) == 1482
+
+
+@pytest.mark.parametrize("filename, q1, q2", [("small_ex.txt", 41, 6), ("input.txt", 4973, 1482)])
+def test_grid_map(filename, q1, q2):
+    grid_map = GridMap.from_file(Path(__file__).parent.absolute() / filename)
+    assert grid_map.predict_guard() == q1
+    assert grid_map.count_obstructions() == q2
+
+
+def test_grid_map_parallel():
+    grid_map = GridMap.from_file(Path(__file__).parent.absolute() / "small_ex.txt")
+    assert grid_map.count_obstructions_parallel(max_workers=2) == 6
@@ -1,8 +1,21 @@
+import contextlib
 import dataclasses
+import time
 from argparse import ArgumentParser
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from itertools import product
 from pathlib import Path
-from typing import Self, Callable
+from typing import Self, Callable, Iterable, Sequence
+
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import mapped, lines, parse_ints
+from aoc.shared import SharedSegment, attach, publish
+from aoc.stats import COUNTERS, add_stats_arguments, counting
+
+logger = get_logger("day_07")
 
 
 def multiply(a: int, b: int) -> int:
@@ -13,16 +26,106 @@ def add(a: int, b: int) -> int:
     return a + b
 
 
-_power_table = {}
+_POWERS_OF_TEN = tuple(pow(10, n) for n in range(1, 40))
+
+
+def _next_power_of_ten(b: int) -> int:
+    """Smallest power of 10 strictly greater than b (i.e. 10 ** digits of b)"""
+    idx = bisect_right(_POWERS_OF_TEN, b)
+    if idx < len(_POWERS_OF_TEN):
+        return _POWERS_OF_TEN[idx]
+    power = _POWERS_OF_TEN[-1]
+    while power <= b:
+        power *= 10
+    return power
 
 
 def concatenate(a: int, b: int) -> int:
-    n = len(str(b))
-    mult = _power_table[n]
-    return a * mult + b
+    return a * _next_power_of_ten(b) + b
+
 
+def _unadd(total: int, b: int) -> int | None:
+    if total < b:
+        return None
+    return total - b
 
-Operator = Callable[[int, int], int]
+
+def _unmultiply(total: int, b: int) -> int | None:
+    if b == 0 or total % b:
+        return None
+    return total // b
+
+
+def _unconcatenate(total: int, b: int) -> int | None:
+    power = _next_power_of_ten(b)
+    if total % power != b:
+        return None
+    return total // power
+
+
+def _add_batch(values: Iterable[int], b: int) -> Iterable[int]:
+    return (a + b for a in values)
+
+
+def _multiply_batch(values: Iterable[int], b: int) -> Iterable[int]:
+    return (a * b for a in values)
+
+
+def _concatenate_batch(values: Iterable[int], b: int) -> Iterable[int]:
+    power = _next_power_of_ten(b)
+    return (a * power + b for a in values)
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Operator:
+    """Binary operator over positive integers.
+
+    `inverse(total, b)` returns the only `a` such that `forward(a, b) == total`, or None when there is none.
+    `monotonic` means `forward(a, b) >= a`, so a partial result above the total can be pruned.
+    """
+
+    name: str
+    forward: Callable[[int, int], int]
+    inverse: Callable[[int, int], int | None] | None = None
+    monotonic: bool = False
+    expand: Callable[[Iterable[int], int], Iterable[int]] | None = None
+
+    def __call__(self, a: int, b: int) -> int:
+        return self.forward(a, b)
+
+    def batch(self, values: Iterable[int], b: int) -> Iterable[int]:
+        """Apply the operator to a whole batch of left operands"""
+        if self.expand is not None:
+            return self.expand(values, b)
+        return (self.forward(a, b) for a in values)
+
+    def __repr__(self):
+        return self.name
+
+
+OPERATORS: dict[str, Operator] = {}
+
+
+def register_operator(operator: Operator) -> Operator:
+    if operator.name in OPERATORS:
+        raise ValueError(f"Operator {operator.name!r} is already registered")
+    OPERATORS[operator.name] = operator
+    return operator
+
+
+def get_operators(*names: str) -> list[Operator]:
+    return [OPERATORS[name] for name in names]
+
+
+ADD = register_operator(Operator(name="+", forward=add, inverse=_unadd, monotonic=True, expand=_add_batch))
+MULTIPLY = register_operator(
+    Operator(name="*", forward=multiply, inverse=_unmultiply, monotonic=True, expand=_multiply_batch)
+)
+CONCATENATE = register_operator(
+    Operator(name="||", forward=concatenate, inverse=_unconcatenate, monotonic=True, expand=_concatenate_batch)
+)
+
+BATCH_BUDGET = 1 << 16
 
 
 @dataclasses.dataclass(frozen=True, kw_only=True)
@@ -35,29 +138,27 @@ class Equation:
 
     @classmethod
     def from_file(cls, filename: Path | str) -> list[Self]:
-        print(f"Loading {filename}")
+        logger.info("Loading %s", filename)
         loaded = []
-        max_number_len = 0
-        with open(filename, "r") as fin:
-            for line in fin:
-                line = line.replace("\n", "")
-                if not line:
-                    continue
-                lhs, rhs = line.split(":")
-                number_strings = rhs.strip().split(" ")
-                max_number_len = max([len(s) for s in number_strings] + [max_number_len])
-                loaded.append(cls(numbers=list(map(int, number_strings)), total=int(lhs.strip())))
-            # preload powers
-            _power_table.update({n: pow(10, n) for n in range(max_number_len + 1)})
+        with mapped(filename) as data:
+            for line in lines(data):
+                total, *numbers = parse_ints(line)
+                loaded.append(cls(numbers=numbers, total=total))
         return loaded
 
-    def calculate(self, operations: list[Operator]) -> int:
+    def cost(self, n_operations: int) -> int:
+        """Number of operator combinations brute_resolve may have to try"""
+        return pow(n_operations, len(self.numbers) - 1)
+
+    def calculate(self, operations: Sequence[Operator]) -> int:
+        if COUNTERS.enabled:
+            COUNTERS.add("day_07.operator_evaluations", len(operations))
         current = self.numbers[0]
         for i, operator in enumerate(operations, start=1):
             current = operator(current, self.numbers[i])
         return current
 
-    def brute_resolve(self, *, operations: list[Operator], verbose: bool = False) -> list[Operator] | None:
+    def brute_resolve(self, *, operations: Sequence[Operator], verbose: bool = False) -> list[Operator] | None:
         prod_args = [operations for _ in range(len(self.numbers) - 1)]
         attempts = list(product(*prod_args))
         for op in attempts:
@@ -65,16 +166,60 @@ class Equation:
             if value == self.total:
                 return op
         if verbose:
-            print(f"  -> {self} noop")
+            logger.info("  -> %s noop", self)
         return None
 
+    def _backward_reachable(self, total: int, i: int, operations: Sequence[Operator]) -> bool:
+        if i == 0:
+            return total == self.numbers[0]
+        for operator in operations:
+            previous = operator.inverse(total, self.numbers[i])
+            if previous is not None and self._backward_reachable(previous, i - 1, operations):
+                return True
+        return False
+
+    def _forward_reachable(self, current: int, i: int, operations: Sequence[Operator], prune: bool) -> bool:
+        if i == len(self.numbers):
+            return current == self.total
+        if prune and current > self.total:
+            return False
+        return any(
+            (
+                self._forward_reachable(operator(current, self.numbers[i]), i + 1, operations, prune)
+                for operator in operations
+            )
+        )
+
+    def prune_resolve(self, *, operations: Sequence[Operator]) -> bool:
+        """Resolve from the total backward when every operator is invertible,
+        otherwise forward cutting branches that overshoot monotonic operators."""
+        if all((operator.inverse is not None for operator in operations)):
+            return self._backward_reachable(self.total, len(self.numbers) - 1, operations)
+        prune = all((operator.monotonic for operator in operations))
+        return self._forward_reachable(self.numbers[0], 1, operations, prune)
+
+    def batch_resolve(self, *, operations: Sequence[Operator], budget: int = BATCH_BUDGET) -> bool:
+        """Expand every reachable value one operand at a time, falls back to prune_resolve over budget"""
+        prune = all((operator.monotonic for operator in operations))
+        values = {self.numbers[0]}
+        for b in self.numbers[1:]:
+            if len(values) * len(operations) > budget:
+                return self.prune_resolve(operations=operations)
+            expanded = set()
+            for operator in operations:
+                expanded.update(operator.batch(values, b))
+            if prune:
+                expanded = {value for value in expanded if value <= self.total}
+            values = expanded
+        return self.total in values
+
 
 DataSet = list[Equation]
 
 
 def brute_resolve(
     dataset: DataSet,
-    operations: list[Operator],
+    operations: Sequence[Operator],
     *,
     verbose: bool,
 ) -> int:
@@ -87,21 +232,162 @@ def brute_resolve(
     )
 
 
-def q1_brute(dataset: DataSet) -> int:
-    return brute_resolve(dataset, operations=[add, multiply], verbose=False)
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class EquationTiming:
+    equation: Equation
+    elapsed_ns: int
+    solved: bool
+
+    def __repr__(self):
+        return f"{self.equation} solved={self.solved} in {self.elapsed_ns / 1e6:.3f}ms"
+
+
+def _flatten(dataset: DataSet) -> dict[str, array] | None:
+    """Numbers of every equation back to back, equation i owning numbers[offsets[i]:offsets[i + 1]].
+
+    None when a value does not fit in int64.
+    """
+    offsets = array("q", [0])
+    numbers = array("q")
+    try:
+        for equation in dataset:
+            numbers.extend(equation.numbers)
+            offsets.append(len(numbers))
+        totals = array("q", (equation.total for equation in dataset))
+    except OverflowError:
+        return None
+    return {"numbers": numbers, "offsets": offsets, "totals": totals}
+
+
+def _resolve_equations(
+    equations: Iterable[tuple[int, Equation]], operations: Sequence[Operator]
+) -> list[tuple[int, int, bool]]:
+    results = []
+    for index, equation in equations:
+        start = time.perf_counter_ns()
+        solved = equation.brute_resolve(operations=operations) is not None
+        results.append((index, time.perf_counter_ns() - start, solved))
+    return results
+
+
+def _resolve_chunk(
+    handle: SharedSegment, indices: list[int], operations: Sequence[Operator]
+) -> list[tuple[int, int, bool]]:
+    with attach(handle) as views:
+        numbers, offsets, totals = views["numbers"], views["offsets"], views["totals"]
+        return _resolve_equations(
+            (
+                (index, Equation(numbers=numbers[offsets[index] : offsets[index + 1]].tolist(), total=totals[index]))
+                for index in indices
+            ),
+            operations,
+        )
+
+
+def parallel_resolve(
+    dataset: DataSet,
+    operations: Sequence[Operator],
+    *,
+    max_workers: int | None = None,
+    chunk_size: int = 8,
+    slowest: int = 10,
+) -> tuple[int, list[EquationTiming]]:
+    """Same as brute_resolve but spreads the equations over a process pool, most expensive first.
+
+    The equations are published once in shared memory as int64 arrays, the workers only receive indices.
+    Values beyond int64 are pickled along with each chunk instead.
+    Returns the calibration total and the timing of the `slowest` equations.
+    """
+    by_cost = sorted(range(len(dataset)), key=lambda index: dataset[index].cost(len(operations)), reverse=True)
+    chunks = [by_cost[i : i + chunk_size] for i in range(0, len(by_cost), chunk_size)]
+
+    timings = []
+    buffers = _flatten(dataset)
+    if buffers is None:
+        logger.info("Values beyond int64, sending the equations to the workers")
+    with (
+        contextlib.nullcontext() if buffers is None else publish(buffers) as handle,
+        ProcessPoolExecutor(max_workers=max_workers) as executor,
+    ):
+        if handle is None:
+            futures = [
+                executor.submit(_resolve_equations, [(index, dataset[index]) for index in chunk], operations)
+                for chunk in chunks
+            ]
+        else:
+            futures = [executor.submit(_resolve_chunk, handle, chunk, operations) for chunk in chunks]
+        for future in as_completed(futures):
+            for index, elapsed_ns, solved in future.result():
+                timings.append(EquationTiming(equation=dataset[index], elapsed_ns=elapsed_ns, solved=solved))
+
+    total = sum((timing.equation.total for timing in timings if timing.solved))
+    timings.sort(key=lambda timing: timing.elapsed_ns, reverse=True)
+    return total, timings[:slowest]
+
+
+def prune_resolve(dataset: DataSet, operations: Sequence[Operator]) -> int:
+    return sum((equation.total for equation in dataset if equation.prune_resolve(operations=operations)))
 
 
-def q2_brute(dataset: DataSet, *, verbose: bool) -> int:
-    return brute_resolve(dataset, operations=[add, multiply, concatenate], verbose=verbose)
+def batch_resolve(dataset: DataSet, operations: Sequence[Operator], *, budget: int = BATCH_BUDGET) -> int:
+    return sum((equation.total for equation in dataset if equation.batch_resolve(operations=operations, budget=budget)))
 
 
-def main(filename: str, verbose: bool):
-    dataset = Equation.from_file(filename)
-    q1 = q1_brute(dataset)
+Q1_OPERATORS = (ADD, MULTIPLY)
+Q2_OPERATORS = (ADD, MULTIPLY, CONCATENATE)
 
-    q2 = q2_brute(dataset, verbose=verbose)
+
+def q1_brute(dataset: DataSet, *, operations: Sequence[Operator] = Q1_OPERATORS) -> int:
+    return brute_resolve(dataset, operations=operations, verbose=False)
+
+
+def q2_brute(dataset: DataSet, *, verbose: bool = False, operations: Sequence[Operator] = Q2_OPERATORS) -> int:
+    return brute_resolve(dataset, operations=operations, verbose=verbose)
+
+
+def q1_prune(dataset: DataSet, *, operations: Sequence[Operator] = Q1_OPERATORS) -> int:
+    return prune_resolve(dataset, operations=operations)
+
+
+def q2_prune(dataset: DataSet, *, operations: Sequence[Operator] = Q2_OPERATORS) -> int:
+    return prune_resolve(dataset, operations=operations)
+
+
+def q1_batch(dataset: DataSet, *, operations: Sequence[Operator] = Q1_OPERATORS) -> int:
+    return batch_resolve(dataset, operations=operations)
+
+
+def q2_batch(dataset: DataSet, *, operations: Sequence[Operator] = Q2_OPERATORS) -> int:
+    return batch_resolve(dataset, operations=operations)
+
+
+def input_size(dataset: DataSet) -> int:
+    return len(dataset)
+
+
+def q2_parallel(dataset: DataSet, *, max_workers: int | None = None, slowest: int = 10) -> int:
+    q2, timings = parallel_resolve(dataset, operations=Q2_OPERATORS, max_workers=max_workers, slowest=slowest)
+    logger.info("Slowest %d equations:", len(timings))
+    for timing in timings:
+        logger.info("  -> %s", timing)
+    return q2
+
+
+def main(filename: str, verbose: bool, workers: int | None, profiler: Profiler):
+    with profiler.phase("day_07_parse"):
+        dataset = Equation.from_file(filename)
+    with profiler.phase("day_07_part_1"):
+        q1 = q1_brute(dataset)
+
+    # the workers are not profiled, only the dispatching
+    with profiler.phase("day_07_part_2"):
+        if workers is None:
+            q2 = q2_brute(dataset, verbose=verbose)
+        else:
+            q2 = q2_parallel(dataset, max_workers=workers or None)
     print(f"Q1: checksum {q1}")
     print(f"Q2: checksum {q2}")
+    profiler.report()
 
 
 if __name__ == "__main__":
@@ -109,6 +395,15 @@ if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="Solve Q2 with a process pool (0 means one per CPU)"
+    )
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
+    add_stats_arguments(parser)
     args = parser.parse_args()
 
-    main(args.input, args.verbose)
+    configure_logging(args.log_level)
+
+    with counting(args.stats):
+        main(args.input, args.verbose, args.workers, Profiler.from_args(args))
@@ -2,7 +2,22 @@ from pathlib import Path
 
 import pytest
 
-from day_07.compute import Equation, DataSet, q1_brute, q2_brute
+from day_07.compute import (
+    Equation,
+    DataSet,
+    q1_brute,
+    q2_brute,
+    q1_prune,
+    q2_prune,
+    q1_batch,
+    q2_batch,
+    parallel_resolve,
+    concatenate,
+    Operator,
+    ADD,
+    MULTIPLY,
+    CONCATENATE,
+)
 
 
 @pytest.fixture(scope="session")
@@ -30,3 +45,66 @@ def test_q1_input(input_txt):
 @pytest.mark.slow
 def test_q2_input(input_txt):
     assert q2_brute(input_txt, verbose=False) == 509463489296712
+
+
+def test_parallel_resolve_small(small_ex_txt):
+    total, timings = parallel_resolve(
+        small_ex_txt, [ADD, MULTIPLY, CONCATENATE], max_workers=2, chunk_size=2, slowest=3
+    )
+    assert total == 11387
+    assert len(timings) == 3
+    assert timings[0].elapsed_ns >= timings[1].elapsed_ns >= timings[2].elapsed_ns
+
+
+def test_parallel_resolve_beyond_int64(small_ex_txt):
+    big = Equation(numbers=[2**63, 1], total=2**63 + 1)
+    total, _ = parallel_resolve([*small_ex_txt, big], [ADD, MULTIPLY], max_workers=2, chunk_size=4)
+    assert total == 3749 + 2**63 + 1
+
+
+def test_equation_cost():
+    assert Equation(numbers=[1, 2, 3, 4], total=10).cost(3) == 27
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        (12, 345, 12345),
+        (1, 0, 10),
+        (7, 9, 79),
+        (7, 10, 710),
+        (1, pow(10, 45), pow(10, 46) + pow(10, 45)),
+    ],
+)
+def test_concatenate(a, b, expected):
+    assert concatenate(a, b) == expected
+    assert CONCATENATE.inverse(expected, b) == a
+
+
+def test_prune_custom_operator():
+    subtract = Operator(name="-", forward=lambda a, b: a - b)
+    equation = Equation(numbers=[10, 3, 2], total=14)
+    assert equation.prune_resolve(operations=[ADD, subtract]) is False
+    assert equation.prune_resolve(operations=[MULTIPLY, subtract]) is True
+    assert q1_brute([equation], operations=[MULTIPLY, subtract]) == 14
+
+
+def test_q1_prune_input(input_txt):
+    assert q1_prune(input_txt) == 3312271365652
+
+
+def test_q2_prune_input(input_txt):
+    assert q2_prune(input_txt) == 509463489296712
+
+
+def test_batch_over_budget():
+    equation = Equation(numbers=[1] * 12, total=12)
+    assert equation.batch_resolve(operations=[ADD, MULTIPLY, CONCATENATE], budget=4) is True
+
+
+def test_q1_batch_small(small_ex_txt):
+    assert q1_batch(small_ex_txt) == 3749
+
+
+def test_q2_batch_input(input_txt):
+    assert q2_batch(input_txt) == 509463489296712
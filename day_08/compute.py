@@ -1,9 +1,20 @@
 import dataclasses
+import heapq
 from argparse import ArgumentParser
+from array import array
+from bisect import bisect_left
 from collections import defaultdict
 from itertools import combinations
 from pathlib import Path
-from typing import Self, ClassVar
+from typing import Self, ClassVar, Iterable, Iterator
+
+from aoc.grid import OUTSIDE, Grid
+from aoc.log import add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import mapped, lines
+from aoc.writer import BufferedSink
+
+logger = get_logger("day_08")
 
 
 @dataclasses.dataclass(frozen=True)
@@ -24,6 +35,124 @@ class Position:
         return f"P({self.x}, {self.y})"
 
 
+_NONZERO = bytes([0] + [1] * 255)
+_BINARY_DIGITS = b"0" + b"1" * 255
+# cells set at once in a byte per cell scratch, then packed into bits
+_CHUNK_CELLS = 1 << 20
+
+
+class Bitset:
+    """Fixed size set of flat grid indices, one bit per cell of a single int"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.bits = 0
+
+    def add(self, idx: int) -> None:
+        self.bits |= 1 << idx
+
+    def update(self, indices: Iterable[int]) -> None:
+        bits = self.bits
+        for idx in indices:
+            bits |= 1 << idx
+        self.bits = bits
+
+    @classmethod
+    def from_slices(cls, size: int, slices: Iterable[slice], *, chunk: int = _CHUNK_CELLS) -> Self:
+        """Indices of slices with positive steps, each set as one slice of a scratch of chunk cells.
+
+        Only the packed bits grow with the size, the scratch stays at chunk bytes.
+        """
+        if chunk % 8:
+            raise ValueError(f"{chunk=} must be a multiple of 8")
+        pending = sorted(slices, key=lambda line: line.start)
+        # bytes of the packed bits, empty chunks all share one block of zeros
+        packed = []
+        zeros = bytes(chunk >> 3)
+        active = []
+        i = 0
+        for lo in range(0, size, chunk):
+            hi = min(lo + chunk, size)
+            while i < len(pending) and pending[i].start < hi:
+                active.append(pending[i])
+                i += 1
+            if not active:
+                packed.append(zeros[: (hi - lo + 7) >> 3])
+                continue
+            scratch = bytearray(hi - lo)
+            still_active = []
+            for line in active:
+                first = line.start if line.start >= lo else line.start - (line.start - lo) // line.step * line.step
+                stop = min(line.stop, hi)
+                if first < stop:
+                    scratch[first - lo : stop - lo : line.step] = b"\x01" * len(range(first, stop, line.step))
+                if line.stop > hi:
+                    still_active.append(line)
+            active = still_active
+            packed.append(int(scratch.translate(_BINARY_DIGITS)[::-1], 2).to_bytes((hi - lo + 7) >> 3, "little"))
+        # the chunks are dropped before the bytes are turned into an int, which copies them once more
+        joined = b"".join(packed)
+        packed.clear()
+        obj = cls(size)
+        obj.bits = int.from_bytes(joined, "little")
+        return obj
+
+    def __contains__(self, idx: int) -> bool:
+        return bool(self.bits >> idx & 1)
+
+    def __ior__(self, other: Self) -> Self:
+        self.bits |= other.bits
+        return self
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __iter__(self) -> Iterator[int]:
+        """Set indices in increasing order, a chunk of bytes at a time, skipping empty bytes in C"""
+        mask = (1 << _CHUNK_CELLS) - 1
+        for lo in range(0, self.size, _CHUNK_CELLS):
+            data = (self.bits >> lo & mask).to_bytes(_CHUNK_CELLS >> 3, "little")
+            flags = data.translate(_NONZERO)
+            i = flags.find(1)
+            while i >= 0:
+                byte = data[i]
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield lo + (i << 3) + bit
+                i = flags.find(1, i + 1)
+
+
+class SparseBitset:
+    """Same reads as Bitset, for few set indices: sorted in an array, 8 bytes each"""
+
+    def __init__(self, indices: Iterable[int] = ()):
+        self.indices = array("q", indices)
+
+    @classmethod
+    def from_slices(cls, slices: Iterable[slice]) -> Self:
+        """Indices of slices with positive steps, merged without duplicates"""
+        return cls(_unique(heapq.merge(*(range(line.start, line.stop, line.step) for line in slices))))
+
+    def __contains__(self, idx: int) -> bool:
+        i = bisect_left(self.indices, idx)
+        return i < len(self.indices) and self.indices[i] == idx
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.indices)
+
+
+def _unique(indices: Iterable[int]) -> Iterator[int]:
+    """Sorted indices without their repeats"""
+    previous = None
+    for idx in indices:
+        if idx != previous:
+            yield idx
+            previous = idx
+
+
 @dataclasses.dataclass
 class Data:
     SKIP: ClassVar = {"."}
@@ -33,19 +162,23 @@ class Data:
     frequency_map: dict[str, list[Position]]
 
     antinodes_map: dict[Position, list[str]] = dataclasses.field(default_factory=dict)
+    # reference counts of (frequency, antinode), only built for add_antenna and remove_antenna
+    _antinode_refs: dict[tuple[str, Position], int] | None = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _limit: int | None = dataclasses.field(default=1, init=False, repr=False, compare=False)
+    antinode_bits: Bitset | None = None
+    frequency_bits: dict[str, SparseBitset] = dataclasses.field(default_factory=dict)
 
     @classmethod
     def from_file(cls, filename: Path | str) -> Self:
-        print(f"Loading {filename}")
+        logger.info("Loading %s", filename)
         frequencies = defaultdict(list)
-        with open(filename, "r") as fin:
+        with mapped(filename) as data:
             y = 0
             x = 0
-            for y, line in enumerate(fin):
-                line = line.replace("\n", "")
-                if not line:
-                    continue
-                for x, char in enumerate(line):
+            for y, line in enumerate(lines(data)):
+                for x, char in enumerate(str(line, "ascii")):
                     if char not in cls.SKIP:
                         frequencies[char].append(Position(x, y))
 
@@ -79,15 +212,33 @@ class Data:
 
         return all_found
 
+    def _update_refs(self, freq: str, positions: list[Position], delta: int) -> None:
+        for pos in positions:
+            key = (freq, pos)
+            count = self._antinode_refs.get(key, 0) + delta
+            if count > 0:
+                if count == delta:
+                    self.antinodes_map.setdefault(pos, []).append(freq)
+                self._antinode_refs[key] = count
+            else:
+                self._antinode_refs.pop(key)
+                freqs = self.antinodes_map[pos]
+                freqs.remove(freq)
+                if not freqs:
+                    del self.antinodes_map[pos]
+
     def populate_antinodes(self, *, limit: int | None = 1) -> int:
         """Returns unique nodes - removes locations of towers"""
         self.antinodes_map = {}
+        self._antinode_refs = None
+        self._limit = limit
+        self.antinode_bits = None
+        self.frequency_bits = {}
         for freq, nodes in self.frequency_map.items():
             antinodes = set()
 
             for pair in combinations(nodes, 2):
                 antinodes.update(self._calculate_antinodes(pair, limit=limit))
-            # print(f"Found {len(antinodes)} antinodes for {freq=} {antinodes}")
             for pos in antinodes:
                 if pos not in self.antinodes_map:
                     self.antinodes_map[pos] = []
@@ -95,34 +246,267 @@ class Data:
 
         return len(self.antinodes_map)
 
+    def _build_refs(self) -> None:
+        """Counts how many pairs give each antinode, with the limit of the last populate"""
+        self.antinodes_map = {}
+        self._antinode_refs = {}
+        self.antinode_bits = None
+        self.frequency_bits = {}
+        for freq, nodes in self.frequency_map.items():
+            for pair in combinations(nodes, 2):
+                self._update_refs(freq, self._calculate_antinodes(pair, limit=self._limit), 1)
+
+    def add_antenna(self, freq: str, position: Position) -> int:
+        """Add an antenna and only update antinodes of its pairs, returns unique nodes"""
+        if not self.contains(position):
+            raise ValueError(f"Antenna {freq=} at {position} is outside the {self.width}x{self.height} grid")
+        if self._antinode_refs is None:
+            self._build_refs()
+        nodes = self.frequency_map.setdefault(freq, [])
+        if position in nodes:
+            raise ValueError(f"Already an antenna {freq=} at {position}")
+        for other in nodes:
+            self._update_refs(freq, self._calculate_antinodes((other, position), limit=self._limit), 1)
+        nodes.append(position)
+        return len(self.antinodes_map)
+
+    def remove_antenna(self, freq: str, position: Position) -> int:
+        """Remove an antenna and only update antinodes of its pairs, returns unique nodes"""
+        if self._antinode_refs is None:
+            self._build_refs()
+        nodes = self.frequency_map.get(freq, [])
+        if position not in nodes:
+            raise ValueError(f"No antenna {freq=} at {position}")
+        nodes.remove(position)
+        for other in nodes:
+            self._update_refs(freq, self._calculate_antinodes((other, position), limit=self._limit), -1)
+        if not nodes:
+            del self.frequency_map[freq]
+        return len(self.antinodes_map)
+
+    @staticmethod
+    def _steps_in_bounds(start: int, step: int, size: int) -> tuple[int, int] | None:
+        """Inclusive range of k such that 0 <= start + k * step < size, None if unbounded"""
+        if step > 0:
+            return -(start // step), (size - 1 - start) // step
+        if step < 0:
+            return -((size - 1 - start) // -step), start // -step
+        return None
+
+    def _harmonic_slices(self, p0: Position, p1: Position, *, limit: int | None) -> list[slice]:
+        """Antinodes of p0 + k * (p1 - p0) as slices over the flat grid (index y * width + x)"""
+        dx, dy = p1.x - p0.x, p1.y - p0.y
+        lo, hi = -max(self.width, self.height), max(self.width, self.height)
+        for bounds in (self._steps_in_bounds(p0.x, dx, self.width), self._steps_in_bounds(p0.y, dy, self.height)):
+            if bounds is not None:
+                lo, hi = max(lo, bounds[0]), min(hi, bounds[1])
+
+        if limit is None:
+            k_ranges = [(lo, hi)]
+        else:
+            k_ranges = [(max(lo, -limit), min(hi, -1)), (max(lo, 2), min(hi, limit + 1))]
+
+        base = p0.y * self.width + p0.x
+        flat_step = dy * self.width + dx
+        slices = []
+        for k_lo, k_hi in k_ranges:
+            if k_lo > k_hi:
+                continue
+            first, last = base + k_lo * flat_step, base + k_hi * flat_step
+            if flat_step < 0:
+                first, last = last, first
+            slices.append(slice(first, last + 1, abs(flat_step)))
+        return slices
+
+    def populate_antinodes_grid(self, *, limit: int | None = 1) -> int:
+        """Same as populate_antinodes but marks whole harmonic lines at once on flat grids"""
+        self.antinodes_map = {}
+        self._antinode_refs = None
+        self._limit = limit
+        self.antinode_bits = None
+        self.frequency_bits = {}
+        all_grid = bytearray(self.width * self.height)
+        freq_grid = bytearray(self.width * self.height)
+        for freq, nodes in self.frequency_map.items():
+            for i in range(len(nodes)):
+                for j in range(i + 1, len(nodes)):
+                    for line in self._harmonic_slices(nodes[i], nodes[j], limit=limit):
+                        ones = b"\x01" * len(range(*line.indices(len(freq_grid))))
+                        freq_grid[line] = ones
+                        all_grid[line] = ones
+
+            idx = freq_grid.find(1)
+            while idx >= 0:
+                freq_grid[idx] = 0
+                pos = Position(idx % self.width, idx // self.width)
+                if pos not in self.antinodes_map:
+                    self.antinodes_map[pos] = []
+                self.antinodes_map[pos].append(freq)
+                idx = freq_grid.find(1, idx + 1)
+
+        return all_grid.count(1)
+
+    def populate_antinodes_bitset(self, *, limit: int | None = 1, layers: bool = False) -> int:
+        """Same as populate_antinodes but only stores bitsets, with per frequency layers if requested.
+
+        antinodes_map is left empty.
+        """
+        self.antinodes_map = {}
+        self._antinode_refs = None
+        self._limit = limit
+        self.frequency_bits = {}
+        self.antinode_bits = self._antinode_bitset(limit=limit, layers=layers)
+
+        return len(self.antinode_bits)
+
+    def _antinode_bitset(self, *, limit: int | None, layers: bool = False) -> Bitset:
+        """Antinodes of all frequencies, with a sparse layer per frequency in frequency_bits if requested"""
+        slices = []
+        for freq, nodes in self.frequency_map.items():
+            freq_slices = [
+                line
+                for i in range(len(nodes))
+                for j in range(i + 1, len(nodes))
+                for line in self._harmonic_slices(nodes[i], nodes[j], limit=limit)
+            ]
+            if layers:
+                self.frequency_bits[freq] = SparseBitset.from_slices(freq_slices)
+            slices.extend(freq_slices)
+        return Bitset.from_slices(self.width * self.height, slices)
+
     def to_file(self, filename: Path | str):
-        print(f"Writing to {filename}")
-        node_map = {pos: "#" for pos in self.antinodes_map.keys()}
+        logger.info("Writing to %s", filename)
+        antennas = defaultdict(list)
         for freq, nodes in self.frequency_map.items():
             for pos in nodes:
-                node_map[pos] = freq
-        with open(filename, "w") as fout:
+                antennas[pos.y].append((pos.x, ord(freq)))
+
+        # a populated map has the antinodes of the bitset of its limit, which gives them in row order
+        bits = self.antinode_bits if self.antinode_bits is not None else self._antinode_bitset(limit=self._limit)
+        antinodes = iter(bits)
+        next_antinode = next(antinodes, None)
+
+        blank = b"." * self.width + b"\n"
+        line = bytearray(blank)
+        with open(filename, "wb") as fout, BufferedSink(fout) as sink:
             for y in range(self.height):
-                line = []
-                for x in range(self.width):
-                    pos = Position(x, y)
-                    char = node_map.get(pos, ".")
-                    line.append(char)
-                fout.write("".join(line) + "\n")
+                line[:] = blank
+                row_start = y * self.width
+                while next_antinode is not None and next_antinode < row_start + self.width:
+                    line[next_antinode - row_start] = ord("#")
+                    next_antinode = next(antinodes, None)
+                for x, char in antennas.get(y, []):
+                    line[x] = char
+                sink.write(line)
+
+
+def q1_antinodes(data: Data) -> int:
+    return data.populate_antinodes()
+
+
+def q2_resonance(data: Data) -> int:
+    return data.populate_antinodes(limit=None)
+
+
+def q1_antinodes_grid(data: Data) -> int:
+    return data.populate_antinodes_grid()
 
 
-def main(filename: str, output_base: str | None):
+def q2_resonance_grid(data: Data) -> int:
+    return data.populate_antinodes_grid(limit=None)
+
+
+def q1_antinodes_bitset(data: Data) -> int:
+    return data.populate_antinodes_bitset()
+
+
+def q2_resonance_bitset(data: Data) -> int:
+    return data.populate_antinodes_bitset(limit=None)
+
+
+def load_grid(filename: Path | str) -> Grid:
+    logger.info("Loading %s", filename)
+    return Grid.from_file(filename)
+
+
+def _steps_inside(start: int, step: int, size: int) -> int | None:
+    """Number of steps k >= 1 such that 0 <= start + k * step < size, None if unbounded"""
+    if step > 0:
+        return (size - 1 - start) // step
+    if step < 0:
+        return start // -step
+    return None
+
+
+def count_antinodes_grid(grid: Grid, *, limit: int | None = 1) -> int:
+    """Same count as Data.populate_antinodes, on the cells of a Grid.
+
+    The antennas of each frequency are found in C and the antinodes of each pair marked as one slice of a second
+    layer over the padded cells.
+    """
+    marks = bytearray(len(grid.cells))
+    skip = {OUTSIDE, *(ord(char) for char in Data.SKIP)}
+    for freq in set(grid.cells) - skip:
+        nodes = list(grid.find_all(bytes([freq])))
+        if limit is None and len(nodes) > 1:
+            # resonant harmonics include the antennas themselves
+            for node in nodes:
+                marks[node] = 1
+        for i, a in enumerate(nodes):
+            ax, ay = grid.xy(a)
+            for b in nodes[i + 1 :]:
+                bx, by = grid.xy(b)
+                dx, dy = bx - ax, by - ay
+                # away from a, then away from b
+                for idx, x, y, sx, sy in ((a, ax, ay, -dx, -dy), (b, bx, by, dx, dy)):
+                    counts = [
+                        n
+                        for n in (_steps_inside(x, sx, grid.width), _steps_inside(y, sy, grid.height), limit)
+                        if n is not None
+                    ]
+                    n = min(counts)
+                    if n <= 0:
+                        continue
+                    step = grid.delta((sx, sy))
+                    first, last = idx + step, idx + n * step
+                    if step < 0:
+                        first, last = last, first
+                    marks[first : last + 1 : abs(step)] = b"\x01" * n
+    return marks.count(1)
+
+
+def q1_antinodes_cells(grid: Grid) -> int:
+    return count_antinodes_grid(grid)
+
+
+def q2_resonance_cells(grid: Grid) -> int:
+    return count_antinodes_grid(grid, limit=None)
+
+
+def input_size(data: Data) -> int:
+    return data.width * data.height
+
+
+def main(filename: str, output_base: str | None, use_grid: bool, profiler: Profiler):
     if output_base is not None and not output_base.endswith(".txt"):
         output_base += ".txt"
-    data = Data.from_file(filename)
-    q1 = data.populate_antinodes()
+    if use_grid:
+        parse, part_1, part_2 = load_grid, q1_antinodes_cells, q2_resonance_cells
+    else:
+        parse, part_1, part_2 = Data.from_file, q1_antinodes, q2_resonance
+    with profiler.phase("day_08_parse"):
+        data = parse(filename)
+    with profiler.phase("day_08_part_1"):
+        q1 = part_1(data)
     print(f"Q1: found {q1} antinode locations")
     if output_base:
         data.to_file(f"q1_{output_base}")
-    q2 = data.populate_antinodes(limit=None)
+    with profiler.phase("day_08_part_2"):
+        q2 = part_2(data)
     print(f"Q2: found {q2} antinode with resonance")
     if output_base:
         data.to_file(f"q2_{output_base}")
+    profiler.report()
 
 
 if __name__ == "__main__":
@@ -130,6 +514,13 @@ if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
     parser.add_argument("--output", type=str, help="base filename for output")
+    parser.add_argument("--grid", action="store_true", help="Use the flat grid solver, without --output")
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
     args = parser.parse_args()
+    if args.grid and args.output:
+        parser.error("--output needs the antinode map, without --grid")
+
+    configure_logging(args.log_level)
 
-    main(args.input, args.output)
+    main(args.input, args.output, args.grid, Profiler.from_args(args))
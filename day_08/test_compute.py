@@ -1,8 +1,18 @@
+import random
 from pathlib import Path
 
 import pytest
 
-from day_08.compute import Data, Position
+from day_08.compute import (
+    Data,
+    Position,
+    Bitset,
+    SparseBitset,
+    count_antinodes_grid,
+    load_grid,
+    q1_antinodes_cells,
+    q2_resonance_cells,
+)
 
 
 @pytest.fixture(scope="session")
@@ -68,6 +78,46 @@ class TestData:
         assert obj.populate_antinodes(limit=None) == len(expected)
         assert obj.antinodes_map == expected
 
+    @pytest.mark.parametrize("limit", [1, None])
+    def test_add_remove_antenna(self, limit):
+        obj = Data(12, 12, {"0": [Position(8, 1), Position(5, 2)], "A": [Position(6, 5)]})
+        obj.populate_antinodes(limit=limit)
+        obj.add_antenna("0", Position(7, 3))
+        found = obj.add_antenna("A", Position(8, 8))
+        incremental_map = obj.antinodes_map
+
+        full = Data(
+            12, 12, {"0": [Position(8, 1), Position(5, 2), Position(7, 3)], "A": [Position(6, 5), Position(8, 8)]}
+        )
+        assert full.populate_antinodes(limit=limit) == found
+        assert incremental_map == full.antinodes_map
+
+        obj.remove_antenna("A", Position(8, 8))
+        obj.remove_antenna("A", Position(6, 5))
+        assert "A" not in obj.frequency_map
+        assert obj.remove_antenna("0", Position(7, 3)) == Data(
+            12, 12, {"0": [Position(8, 1), Position(5, 2)]}
+        ).populate_antinodes(limit=limit)
+
+    def test_add_antenna_twice(self):
+        obj = Data(10, 10, {"a": [Position(4, 3)]})
+        obj.add_antenna("a", Position(5, 5))
+        assert obj.antinodes_map == {Position(3, 1): ["a"], Position(6, 7): ["a"]}
+        with pytest.raises(ValueError):
+            obj.add_antenna("a", Position(5, 5))
+        with pytest.raises(ValueError):
+            obj.add_antenna("a", Position(10, 5))
+        with pytest.raises(ValueError):
+            obj.add_antenna("a", Position(5, -1))
+
+    def test_refs_built_on_first_change(self):
+        obj = Data(10, 10, {"a": [Position(4, 3), Position(5, 5)]})
+        assert obj.populate_antinodes() == 2
+        assert obj._antinode_refs is None
+        assert obj == Data(10, 10, {"a": [Position(4, 3), Position(5, 5)]}, obj.antinodes_map)
+        assert obj.remove_antenna("a", Position(5, 5)) == 0
+        assert obj._antinode_refs == {}
+
 
 def test_q1_small(small_ex_txt):
     found = small_ex_txt.populate_antinodes()
@@ -87,3 +137,107 @@ def test_q1(input_txt):
 def test_q2(input_txt):
     found = input_txt.populate_antinodes(limit=None)
     assert found == 1019
+
+
+@pytest.mark.parametrize("limit", [1, 2, None])
+def test_populate_antinodes_grid(small_ex_txt, input_txt, limit):
+    for data in (small_ex_txt, input_txt):
+        expected = data.populate_antinodes(limit=limit)
+        expected_map = data.antinodes_map
+        assert data.populate_antinodes_grid(limit=limit) == expected
+        assert data.antinodes_map == expected_map
+
+
+def test_populate_antinodes_grid_resonance_line():
+    obj = Data(10, 3, {"a": [Position(4, 1), Position(5, 1)]})
+    assert obj.populate_antinodes_grid(limit=None) == 10
+    assert obj.populate_antinodes_grid() == 2
+    assert obj.antinodes_map == {Position(3, 1): ["a"], Position(6, 1): ["a"]}
+
+
+class TestBitset:
+    def test_bitset(self):
+        bits = Bitset(20)
+        bits.update([19, 0, 9, 8])
+        bits.add(9)
+        assert len(bits) == 4
+        assert list(bits) == [0, 8, 9, 19]
+        assert 9 in bits
+        assert 10 not in bits
+
+        other = Bitset(20)
+        other.add(10)
+        bits |= other
+        assert list(bits) == [0, 8, 9, 10, 19]
+
+    @pytest.mark.parametrize("chunk", [8, 16, 1 << 20])
+    def test_from_slices(self, chunk):
+        slices = [slice(3, 40, 5), slice(0, 1, 1), slice(38, 41, 1), slice(17, 18, 9)]
+        bits = Bitset.from_slices(41, slices, chunk=chunk)
+        expected = sorted({idx for line in slices for idx in range(line.start, line.stop, line.step)})
+        assert list(bits) == expected
+        assert len(bits) == len(expected)
+        assert list(SparseBitset.from_slices(slices)) == expected
+        assert 38 in SparseBitset.from_slices(slices)
+        assert 37 not in SparseBitset.from_slices(slices)
+        assert len(Bitset.from_slices(0, [])) == 0
+
+
+def _rendered(data: Data) -> str:
+    rows = [["."] * data.width for _ in range(data.height)]
+    for pos in data.antinodes_map:
+        rows[pos.y][pos.x] = "#"
+    for freq, positions in data.frequency_map.items():
+        for pos in positions:
+            rows[pos.y][pos.x] = freq
+    return "".join(("".join(row) + "\n" for row in rows))
+
+
+@pytest.mark.parametrize("limit", [1, None])
+def test_to_file_after_changes(limit, tmp_path):
+    obj = Data(12, 12, {"0": [Position(8, 1), Position(5, 2)], "A": [Position(6, 5)]})
+    obj.populate_antinodes(limit=limit)
+    obj.add_antenna("A", Position(8, 8))
+    obj.remove_antenna("0", Position(5, 2))
+    obj.to_file(tmp_path / "map.txt")
+    assert (tmp_path / "map.txt").read_text() == _rendered(obj)
+
+
+@pytest.mark.parametrize("limit", [1, None])
+def test_populate_antinodes_bitset(input_txt, limit, tmp_path):
+    expected = input_txt.populate_antinodes(limit=limit)
+    expected_map = input_txt.antinodes_map
+    input_txt.to_file(tmp_path / "map.txt")
+    assert (tmp_path / "map.txt").read_text() == _rendered(input_txt)
+
+    assert input_txt.populate_antinodes_bitset(limit=limit, layers=True) == expected
+    for freq, bits in input_txt.frequency_bits.items():
+        assert {pos for pos, freqs in expected_map.items() if freq in freqs} == {
+            Position(idx % input_txt.width, idx // input_txt.width) for idx in bits
+        }
+    input_txt.to_file(tmp_path / "bits.txt")
+    assert (tmp_path / "bits.txt").read_text() == (tmp_path / "map.txt").read_text()
+    assert input_txt.populate_antinodes_bitset(limit=limit) == expected
+
+
+@pytest.mark.parametrize("filename", ["small_ex.txt", "input.txt"])
+@pytest.mark.parametrize("limit", [1, None])
+def test_count_antinodes_grid(filename, limit):
+    filename = Path(__file__).parent.absolute() / filename
+    assert count_antinodes_grid(load_grid(filename), limit=limit) == Data.from_file(filename).populate_antinodes(
+        limit=limit
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_count_antinodes_grid_random(seed, tmp_path):
+    rnd = random.Random(seed)
+    width, height = rnd.randint(1, 12), rnd.randint(1, 12)
+    filename = tmp_path / "input.txt"
+    filename.write_text(
+        "".join(("".join((rnd.choice("....aAb0") for _ in range(width))) + "\n" for _ in range(height)))
+    )
+    grid = load_grid(filename)
+    data = Data.from_file(filename)
+    assert q1_antinodes_cells(grid) == data.populate_antinodes()
+    assert q2_resonance_cells(grid) == data.populate_antinodes(limit=None)
@@ -1,8 +1,25 @@
 import dataclasses
+import heapq
+import mmap
 from argparse import ArgumentParser
+from array import array
+from bisect import bisect_left, bisect_right
 from copy import deepcopy
 from pathlib import Path
-from typing import Self
+from typing import Self, ClassVar, Iterable, Iterator, Sequence
+
+from aoc.log import Progress, add_log_arguments, configure_logging, get_logger
+from aoc.profiling import Profiler, add_profile_arguments
+from aoc.reader import blocks, mapped
+from aoc.stats import COUNTERS, add_stats_arguments, counting
+from aoc.writer import BufferedSink
+
+logger = get_logger("day_09")
+
+
+def _run_checksum(file_id: int, position: int, size: int) -> int:
+    """Checksum of `size` blocks of file_id from position, sum of an arithmetic series"""
+    return file_id * (size * (2 * position + size - 1) // 2)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -25,7 +42,181 @@ class Offset:
         return f"O({self.offset},{self.size})"
 
     def checksum(self, file_id: int) -> int:
-        return sum((i * file_id for i in range(self.offset, self.offset + self.size)))
+        return _run_checksum(file_id, self.offset, self.size)
+
+
+class BucketFreeIndex:
+    """Free spaces in one min-heap of offsets per size, for disk maps of single digit spans.
+
+    Removed spaces are only dropped from a heap when they reach its top.
+    """
+
+    # free spaces of size >= MAX_BUCKET share the last bucket
+    MAX_BUCKET: ClassVar[int] = 9
+
+    def __init__(self):
+        self._sizes: dict[int, int] = {}
+        self._heaps: list[list[int]] = [[] for _ in range(self.MAX_BUCKET + 1)]
+
+    def add(self, space: Offset) -> None:
+        self._sizes[space.offset] = space.size
+        heapq.heappush(self._heaps[min(space.size, self.MAX_BUCKET)], space.offset)
+
+    def remove(self, space: Offset) -> None:
+        self._sizes.pop(space.offset)
+
+    def _bucket_top(self, bucket: int) -> int | None:
+        heap = self._heaps[bucket]
+        while heap:
+            size = self._sizes.get(heap[0])
+            if size is not None and min(size, self.MAX_BUCKET) == bucket:
+                return heap[0]
+            if COUNTERS.enabled:
+                COUNTERS.add("day_09.free_space_scan_steps")
+            heapq.heappop(heap)
+        return None
+
+    def first(self, *, left_of: int, size_gte: int | None = None) -> int | None:
+        if size_gte is not None and size_gte > self.MAX_BUCKET:
+            if COUNTERS.enabled:
+                COUNTERS.add("day_09.free_space_scan_steps", len(self._sizes))
+            return min(
+                (offset for offset, size in self._sizes.items() if offset < left_of and size >= size_gte),
+                default=None,
+            )
+
+        if COUNTERS.enabled:
+            COUNTERS.add("day_09.free_space_scan_steps", self.MAX_BUCKET + 1 - (size_gte or 0))
+        found: int | None = None
+        for bucket in range(size_gte or 0, self.MAX_BUCKET + 1):
+            offset = self._bucket_top(bucket)
+            if offset is not None and offset < left_of and (found is None or offset < found):
+                found = offset
+        return found
+
+
+class TreeFreeIndex:
+    """Free spaces of any size in a max segment tree over slots in offset order.
+
+    Leaves hold size + 1 of the free space in that slot, 0 when there is none. For a Disk the slots are the spans of
+    the loaded disk map, which each hold at most one non-empty free space, so the tree follows the number of spans and
+    not the disk size. from_sizes keys the slots by position in its sizes.
+    """
+
+    def __init__(self, capacity: int = 1):
+        self._leaves = 1
+        while self._leaves < capacity:
+            self._leaves *= 2
+        self._tree = array("q", bytes(16 * self._leaves))
+        # first offset of each slot, and offset of its free space, only used through add, remove and first
+        self._starts = array("q", [0])
+        self._offsets = array("q", [0])
+
+    def _grow(self, capacity: int) -> None:
+        leaves = self._leaves
+        while leaves < capacity:
+            leaves *= 2
+        tree = array("q", bytes(16 * leaves))
+        tree[leaves : leaves + self._leaves] = self._tree[self._leaves :]
+        for node in range(leaves - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._leaves = leaves
+        self._tree = tree
+
+    @classmethod
+    def from_sizes(cls, sizes: Sequence[int]) -> Self:
+        """Index keyed by position in `sizes`, built bottom-up in O(n)"""
+        obj = cls(len(sizes))
+        tree = obj._tree
+        for i, size in enumerate(sizes):
+            tree[obj._leaves + i] = size + 1
+        for node in range(obj._leaves - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        return obj
+
+    def _set(self, slot: int, value: int) -> None:
+        if slot >= self._leaves:
+            self._grow(slot + 1)
+        tree = self._tree
+        node = slot + self._leaves
+        tree[node] = value
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+    def set_size(self, slot: int, size: int | None) -> None:
+        self._set(slot, 0 if size is None else size + 1)
+
+    def first_slot(self, *, left_of: int, size_gte: int | None = None) -> int | None:
+        """Leftmost slot before left_of holding at least size_gte"""
+        threshold = (size_gte or 0) + 1
+        tree = self._tree
+        # depth first, left child before right child, skipping sub-trees too small or not left of left_of
+        stack = [(1, 0, self._leaves)]
+        found = None
+        visited = 0
+        while stack:
+            visited += 1
+            node, lo, width = stack.pop()
+            if lo >= left_of or tree[node] < threshold:
+                continue
+            if width == 1:
+                found = lo
+                break
+            width //= 2
+            stack.append((2 * node + 1, lo + width, width))
+            stack.append((2 * node, lo, width))
+        if COUNTERS.enabled:
+            COUNTERS.add("day_09.free_space_scan_steps", visited)
+        return found
+
+    def _slot(self, space: Offset) -> int:
+        starts = self._starts
+        # the loaded spans arrive in offset order, each free space also starts the slot of the file after it
+        for boundary in (space.offset, space.next):
+            if boundary > starts[-1]:
+                starts.append(boundary)
+                self._offsets.append(0)
+        return bisect_right(starts, space.offset) - 1
+
+    def add(self, space: Offset) -> None:
+        slot = self._slot(space)
+        if not space.size:
+            # empty spaces left behind by moves can share a slot with a real one
+            return
+        if slot < self._leaves and self._tree[self._leaves + slot] and self._offsets[slot] != space.offset:
+            raise ValueError(f"Slot from {self._starts[slot]} already holds a free space at {self._offsets[slot]}")
+        self._offsets[slot] = space.offset
+        self.set_size(slot, space.size)
+
+    def remove(self, space: Offset) -> None:
+        slot = self._slot(space)
+        if self._offsets[slot] == space.offset:
+            self.set_size(slot, None)
+
+    def first(self, *, left_of: int, size_gte: int | None = None) -> int | None:
+        slot = self.first_slot(left_of=bisect_left(self._starts, left_of), size_gte=size_gte)
+        # slots are in offset order, only the last one before left_of can hold a free space right of it
+        if slot is None or self._offsets[slot] >= left_of:
+            return None
+        return self._offsets[slot]
+
+
+FreeSpaceIndex = BucketFreeIndex | TreeFreeIndex
+
+
+def _write_spans(filename: Path | str, header: str, spans: Iterable[tuple[int | None, int]]) -> None:
+    """One |-separated cell per (file_id or None for free, size) span, 4 characters per block"""
+    with open(filename, "wb") as fout, BufferedSink(fout) as sink:
+        sink.write(f"{header}\n|".encode())
+        for file_id, size in spans:
+            half = size // 2
+            sink.write(b"____" * half)
+            sink.write(b"----" if file_id is None else b"%04d" % file_id)
+            sink.write(b"____" * (size - half))
+            sink.write(b"|")
+        sink.write(b"\n")
 
 
 @dataclasses.dataclass
@@ -34,6 +225,11 @@ class Disk:
     _file_map: dict[int, list[Offset]] = dataclasses.field(default_factory=dict)
     _free_spaces: dict[int, Offset] = dataclasses.field(default_factory=dict)
     _prev_free_spaces: dict[int, int] = dataclasses.field(default_factory=dict)
+    _free_index: FreeSpaceIndex = dataclasses.field(default_factory=BucketFreeIndex)
+    # offset -> id of the file extent starting there, kept up to date by _set_file
+    _file_starts: dict[int, int] = dataclasses.field(default_factory=dict)
+    # kept up to date by _set_file
+    _checksum: int = 0
 
     @property
     def free_size(self) -> int:
@@ -47,34 +243,38 @@ class Disk:
         return self._file_map.get(file_id)
 
     @classmethod
-    def from_file(cls, filename: Path | str) -> Self:
-        print(f"Loading {filename}")
-        obj = cls()
+    def from_spans(cls, spans: Iterable[int], *, free_index: type[FreeSpaceIndex] = BucketFreeIndex) -> Self:
+        """Build from alternating file and free space sizes"""
+        obj = cls(_free_index=free_index())
         current_file_id = 0
         current_offset = 0
-        with open(filename, "r") as fin:
-            for line in fin:
-                line = line.rstrip("\n")
-                if not line:
-                    continue
-                for i, size in enumerate(map(int, line)):
-                    size = size
-                    offset = Offset(current_offset, size)
-                    is_file = i % 2 == 0
-                    if is_file:
-                        obj._file_map[current_file_id] = [offset]
-                        current_file_id += 1
-                    else:
-                        obj.add_free_space(offset)
-                    current_offset += size
+        for i, size in enumerate(spans):
+            offset = Offset(current_offset, size)
+            is_file = i % 2 == 0
+            if is_file:
+                obj._set_file(current_file_id, [offset])
+                current_file_id += 1
+            else:
+                obj.add_free_space(offset)
+            current_offset += size
 
         obj.disk_size = current_offset
         assert obj.free_size + obj.file_size == obj.disk_size
-        print(f"  -> Loaded {len(obj._file_map)} files and {len(obj._free_spaces)} free spaces")
-        print(f"  -> Free {obj.free_size}/{obj.disk_size}")
         return obj
 
-    def first_free_space(self, *, left_of: int, size_gte: int | None = None) -> Offset | None:
+    @classmethod
+    def from_file(cls, filename: Path | str, *, free_index: type[FreeSpaceIndex] = BucketFreeIndex) -> Self:
+        logger.info("Loading %s", filename)
+        with mapped(filename) as data:
+            obj = cls.from_spans(_spans_from_blocks(data), free_index=free_index)
+
+        logger.info("  -> Loaded %d files and %d free spaces", len(obj._file_map), len(obj._free_spaces))
+        logger.info("  -> Free %d/%d", obj.free_size, obj.disk_size)
+        return obj
+
+    def _scan_free_space(self, *, left_of: int, size_gte: int | None = None) -> Offset | None:
+        if COUNTERS.enabled:
+            COUNTERS.add("day_09.free_space_scan_steps", len(self._free_spaces))
         found: Offset | None = None
         for offset, space in self._free_spaces.items():
             if (
@@ -85,6 +285,14 @@ class Disk:
                 found = space
         return found
 
+    def first_free_space(self, *, left_of: int, size_gte: int | None = None) -> Offset | None:
+        if COUNTERS.enabled:
+            COUNTERS.add("day_09.first_free_space")
+        found = self._free_index.first(left_of=left_of, size_gte=size_gte)
+        if found is None:
+            return None
+        return self._free_spaces[found]
+
     def add_free_space(self, space: Offset):
         if existing := self._free_spaces.get(space.next):
             self.rem_free_space(existing)
@@ -101,11 +309,24 @@ class Disk:
         else:
             self._free_spaces[space.offset] = space
             self._prev_free_spaces[space.next] = space.offset
+            self._free_index.add(space)
 
     def rem_free_space(self, space: Offset) -> None:
         offset = space.offset
         self._free_spaces.pop(offset)
         self._prev_free_spaces.pop(space.next)
+        self._free_index.remove(space)
+
+    def _set_file(self, file_id: int, offsets: list[Offset]) -> None:
+        for off in self._file_map.get(file_id, []):
+            self._checksum -= off.checksum(file_id)
+            if self._file_starts.get(off.offset) == file_id:
+                del self._file_starts[off.offset]
+        for off in offsets:
+            self._checksum += off.checksum(file_id)
+            if off.size:
+                self._file_starts[off.offset] = file_id
+        self._file_map[file_id] = offsets
 
     def _fragment_to_free_space(self, file_id: int):
         this_file_map = self._file_map[file_id]
@@ -138,12 +359,13 @@ class Disk:
 
         if size_unmoved:
             this_file_map.append(Offset(original_left_most, size_unmoved))
-            new_free_space = Offset(original_left_most + size_moved, size_moved)
+            # the moved blocks are the last ones of the file
+            new_free_space = Offset(original_left_most + size_unmoved, size_moved)
         else:
             new_free_space = Offset(original_left_most, size_moved)
 
         self.add_free_space(new_free_space)
-        self._file_map[file_id] = this_file_map
+        self._set_file(file_id, this_file_map)
 
     def _move_to_free_space(self, file_id: int):
         size = 0
@@ -166,7 +388,7 @@ class Disk:
                 self.add_free_space(left_free)
             for space in self._file_map[file_id]:
                 self.add_free_space(space)
-            self._file_map[file_id] = [new_file]
+            self._set_file(file_id, [new_file])
             # print(f"  -> {file_id=} moved from left_most={left_most}..{new_file.offset}")
 
         # if found is None:
@@ -174,69 +396,341 @@ class Disk:
 
     def compress(self) -> Self:
         obj = deepcopy(self)
-        print("Compressing disk")
-        if (n_files := len(obj._file_map)) > 100:
-            n_files = len(obj._file_map) // 100
-        for file_id in sorted(obj._file_map.keys(), reverse=True):
-            obj._fragment_to_free_space(file_id)
-            if file_id % n_files == (n_files - 1):
-                print(".", end="", flush=True)
-        print("")
+        file_ids = sorted(obj._file_map.keys(), reverse=True)
+        with Progress(logger, "Compressing disk", len(file_ids)) as progress:
+            for done, file_id in enumerate(file_ids):
+                obj._fragment_to_free_space(file_id)
+                progress.update(done)
         return obj
 
     def defragment(self) -> Self:
         obj = deepcopy(self)
-        print("Defragmenting disk")
-        if (n_files := len(obj._file_map)) > 100:
-            n_files = len(obj._file_map) // 100
-        for file_id in sorted(obj._file_map.keys(), reverse=True):
-            obj._move_to_free_space(file_id)
-            if file_id % n_files == (n_files - 1):
-                print(".", end="", flush=True)
-        print("")
+        file_ids = sorted(obj._file_map.keys(), reverse=True)
+        with Progress(logger, "Defragmenting disk", len(file_ids)) as progress:
+            for done, file_id in enumerate(file_ids):
+                obj._move_to_free_space(file_id)
+                progress.update(done)
         return obj
 
     def checksum(self) -> int:
+        return self._checksum
+
+    def _compute_checksum(self) -> int:
         return sum((sum((off.checksum(file_id) for off in offset)) for file_id, offset in self._file_map.items()))
 
-    def _size_to_str(self, file_id: int | None, size: int) -> str:
-        half = size // 2
-        if file_id is None:
-            file_str = "----"
+    def spans(self) -> Iterator[tuple[int | None, int]]:
+        """(file_id, size) of each file extent and (None, size) of each free space, from offset 0"""
+        position = 0
+        while position < self.disk_size:
+            # a file hides a free space at the same offset
+            if (file_id := self._file_starts.get(position)) is not None:
+                size = next((off.size for off in self._file_map[file_id] if off.offset == position))
+                yield file_id, size
+            else:
+                size = self._free_spaces[position].size
+                if not size:
+                    raise ValueError(f"Nothing covers the disk at {position}")
+                yield None, size
+            position += size
+
+    def to_file(self, filename: Path | str):
+        logger.info("Writing %s", filename)
+        _write_spans(filename, f"free={self.free_size} file={self.file_size} total={self.disk_size}", self.spans())
+
+
+_DIGITS = bytes.maketrans(b"0123456789", bytes(range(10)))
+
+
+def _spans_from_blocks(data: bytes | mmap.mmap) -> Iterator[int]:
+    """Digits of a disk map as ints, one block of the file at a time"""
+    for block in blocks(data):
+        chars = block.tobytes().translate(None, b"\r\n")
+        if chars and not chars.isdigit():
+            char = next((char for char in chars if not 0x30 <= char <= 0x39))
+            raise ValueError(f"Not a digit in the disk map: {bytes([char])!r}")
+        yield from chars.translate(_DIGITS)
+
+
+def compress_checksum(spans: Sequence[int]) -> int:
+    """Q1 checksum straight from the disk map: files from the right fill gaps from the left, in O(1) memory"""
+    checksum = 0
+    position = 0
+    left = 0
+    right = len(spans) - 1 if len(spans) % 2 else len(spans) - 2
+    right_size = spans[right] if right >= 0 else 0
+    while left < right:
+        size = spans[left]
+        if left % 2 == 0:
+            checksum += _run_checksum(left // 2, position, size)
+            position += size
         else:
-            file_str = f"{file_id:04d}"
-        return "".join(["____"] * half) + file_str + "".join(["____"] * (size - half))
+            while size and left < right:
+                moved = min(size, right_size)
+                checksum += _run_checksum(right // 2, position, moved)
+                position += moved
+                size -= moved
+                right_size -= moved
+                if not right_size:
+                    right -= 2
+                    right_size = spans[right] if right >= 0 else 0
+        left += 1
+    if left == right:
+        checksum += _run_checksum(right // 2, position, right_size)
+    return checksum
+
+
+class _MappedSpans(Sequence[int]):
+    """Digits of a one line disk map as ints, read from the bytes of the map without copying them"""
+
+    def __init__(self, data: bytes | mmap.mmap, *, block_size: int = 1 << 20):
+        self.data = data
+        end = len(data)
+        while end and data[end - 1] in b"\r\n":
+            end -= 1
+        self.end = end
+        # checked a block at a time: compress_checksum does not read every free space on the right
+        for start in range(0, end, block_size):
+            chars = data[start : min(start + block_size, end)]
+            if not chars.isdigit():
+                char = next((char for char in chars if not 0x30 <= char <= 0x39))
+                raise ValueError(f"Not a digit in the disk map: {bytes([char])!r}")
+
+    def __len__(self) -> int:
+        return self.end
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < self.end:
+            raise IndexError(i)
+        return self.data[i] - 0x30
+
+
+def compress_checksum_file(filename: Path | str) -> int:
+    """compress_checksum on the memory mapped disk map: both ends are read in place, in O(1) memory"""
+    logger.info("Loading %s", filename)
+    with mapped(filename) as data:
+        return compress_checksum(_MappedSpans(data))
+
+
+class CompactDisk:
+    """Disk kept in parallel array("q") buffers: one entry per file extent and one per free space.
+
+    Both are sorted by offset. Extents are loaded in file id order, compress and defragment expect that layout and return
+    a new disk with extents sorted by offset and free spaces rebuilt from the gaps.
+    """
+
+    def __init__(self, disk_size: int = 0):
+        self.disk_size = disk_size
+        self.file_ids = array("q")
+        self.file_offsets = array("q")
+        self.file_sizes = array("q")
+        self.free_offsets = array("q")
+        self.free_sizes = array("q")
+
+    @classmethod
+    def from_spans(cls, spans: Iterable[int]) -> Self:
+        """Build from alternating file and free space sizes"""
+        obj = cls()
+        current_offset = 0
+        for i, size in enumerate(spans):
+            if i % 2 == 0:
+                obj.file_ids.append(i // 2)
+                obj.file_offsets.append(current_offset)
+                obj.file_sizes.append(size)
+            elif obj.free_offsets and obj.free_offsets[-1] + obj.free_sizes[-1] == current_offset:
+                # after an empty file, like Disk.add_free_space merges adjacent free spaces
+                obj.free_sizes[-1] += size
+            else:
+                obj.free_offsets.append(current_offset)
+                obj.free_sizes.append(size)
+            current_offset += size
+        obj.disk_size = current_offset
+        return obj
+
+    @classmethod
+    def from_file(cls, filename: Path | str) -> Self:
+        logger.info("Loading %s", filename)
+        with mapped(filename) as data:
+            obj = cls.from_spans(_spans_from_blocks(data))
+        logger.info("  -> Loaded %d files and %d free spaces", len(obj.file_ids), len(obj.free_offsets))
+        logger.info("  -> Free %d/%d", obj.free_size, obj.disk_size)
+        return obj
+
+    @property
+    def free_size(self) -> int:
+        return sum(self.free_sizes)
+
+    @property
+    def file_size(self) -> int:
+        return sum(self.file_sizes)
+
+    def checksum(self) -> int:
+        return sum(map(_run_checksum, self.file_ids, self.file_offsets, self.file_sizes))
+
+    def _check_loaded_layout(self):
+        if any((self.file_ids[i] != i for i in range(len(self.file_ids)))):
+            raise ValueError("Expected one extent per file in file id order")
+
+    def _with_free_spaces(self, ids: array, offsets: array, sizes: array) -> Self:
+        """New disk of these extents, already sorted by offset, with free spaces rebuilt from the gaps"""
+        obj = type(self)(self.disk_size)
+        obj.file_ids, obj.file_offsets, obj.file_sizes = ids, offsets, sizes
+
+        position = 0
+        for offset, size in zip(obj.file_offsets, obj.file_sizes):
+            if not size:
+                # an empty file does not split a free space
+                continue
+            if offset > position:
+                obj.free_offsets.append(position)
+                obj.free_sizes.append(offset - position)
+            position = max(position, offset + size)
+        if position < self.disk_size:
+            obj.free_offsets.append(position)
+            obj.free_sizes.append(self.disk_size - position)
+        return obj
+
+    def compress(self) -> Self:
+        """Q1: fill gaps from the left with blocks of files from the right"""
+        self._check_loaded_layout()
+        offsets, sizes = self.file_offsets, self.file_sizes
+        new_ids, new_offsets, new_sizes = array("q"), array("q"), array("q")
+
+        right = len(sizes) - 1
+        right_size = sizes[right] if right >= 0 else 0
+        for left in range(len(sizes)):
+            if left >= right:
+                if left == right and right_size:
+                    new_ids.append(right)
+                    new_offsets.append(offsets[right])
+                    new_sizes.append(right_size)
+                break
+            new_ids.append(left)
+            new_offsets.append(offsets[left])
+            new_sizes.append(sizes[left])
+
+            gap_start, gap_end = offsets[left] + sizes[left], offsets[left + 1]
+            while gap_start < gap_end and right > left:
+                moved = min(gap_end - gap_start, right_size)
+                if moved:
+                    new_ids.append(right)
+                    new_offsets.append(gap_start)
+                    new_sizes.append(moved)
+                gap_start += moved
+                right_size -= moved
+                if not right_size:
+                    right -= 1
+                    right_size = sizes[right]
+
+        # gaps are filled from the left and the last file keeps its place: extents come out in offset order
+        return self._with_free_spaces(new_ids, new_offsets, new_sizes)
+
+    def defragment(self) -> Self:
+        """Q2: move whole files, highest id first, to the leftmost free space big enough"""
+        self._check_loaded_layout()
+        offsets = self.file_offsets[:]
+        free_offsets = self.free_offsets[:]
+        free_sizes = self.free_sizes[:]
+        # a file only moves left of itself so spaces it frees are never used by files processed later
+        index = TreeFreeIndex.from_sizes(free_sizes)
+        # files moved to each free space in placement order, i.e. offset order, as linked lists
+        first_moved = array("q", [-1]) * len(free_offsets)
+        last_moved = array("q", [-1]) * len(free_offsets)
+        next_moved = array("q", [-1]) * len(offsets)
+        for file_id in range(len(offsets) - 1, -1, -1):
+            size = self.file_sizes[file_id]
+            if not size:
+                # moving an empty file changes nothing
+                continue
+            found = index.first_slot(left_of=bisect_left(free_offsets, offsets[file_id]), size_gte=size)
+            if found is None:
+                continue
+            offsets[file_id] = free_offsets[found]
+            free_offsets[found] += size
+            free_sizes[found] -= size
+            index.set_size(found, free_sizes[found])
+            if last_moved[found] < 0:
+                first_moved[found] = file_id
+            else:
+                next_moved[last_moved[found]] = file_id
+            last_moved[found] = file_id
+
+        def moved() -> Iterator[int]:
+            for free in range(len(first_moved)):
+                file_id = first_moved[free]
+                while file_id >= 0:
+                    yield file_id
+                    file_id = next_moved[file_id]
+
+        # both in offset order: merged without sorting every extent
+        stayed = (file_id for file_id in range(len(offsets)) if offsets[file_id] == self.file_offsets[file_id])
+        ids = array("q", heapq.merge(stayed, moved(), key=lambda file_id: (offsets[file_id], file_id)))
+
+        sizes = self.file_sizes
+        return self._with_free_spaces(
+            ids, array("q", (offsets[file_id] for file_id in ids)), array("q", (sizes[file_id] for file_id in ids))
+        )
+
+    def spans(self) -> Iterator[tuple[int | None, int]]:
+        """Same as Disk.spans"""
+        frees = zip(self.free_offsets, self.free_sizes)
+        free = next(frees, None)
+        for offset, file_id, size in zip(self.file_offsets, self.file_ids, self.file_sizes):
+            while free is not None and free[0] <= offset:
+                # like Disk.to_file a file hides a free space at the same offset
+                if free[0] < offset:
+                    yield None, free[1]
+                free = next(frees, None)
+            yield file_id, size
+        while free is not None:
+            yield None, free[1]
+            free = next(frees, None)
 
     def to_file(self, filename: Path | str):
-        print(f"Writing {filename}")
-        with open(filename, "w") as fout:
-            disk_map = {}
-            fout.write(f"free={self.free_size} file={self.file_size} total={self.disk_size}\n")
-            fout.write("|")
-            for offset in self._free_spaces.values():
-                disk_map[offset.offset] = self._size_to_str(None, offset.size)
-            for file_id, offsets in self._file_map.items():
-                for off in offsets:
-                    disk_map[off.offset] = self._size_to_str(file_id, off.size)
-            for off in sorted(disk_map.keys()):
-                fout.write(disk_map[off] + "|")
-            fout.write("\n")
-
-
-def main(filename: str, output: bool):
-    disk = Disk.from_file(filename)
+        logger.info("Writing %s", filename)
+        _write_spans(filename, f"free={self.free_size} file={self.file_size} total={self.disk_size}", self.spans())
+
+
+def q1_compress(disk: Disk) -> int:
+    return disk.compress().checksum()
+
+
+def q2_defragment(disk: Disk) -> int:
+    return disk.defragment().checksum()
+
+
+def q1_compress_compact(disk: CompactDisk) -> int:
+    return disk.compress().checksum()
+
+
+def q2_defragment_compact(disk: CompactDisk) -> int:
+    return disk.defragment().checksum()
+
+
+def input_size(disk: Disk) -> int:
+    return disk.disk_size
+
+
+def main(filename: str, output: bool, free_index: type[FreeSpaceIndex], stream: bool, profiler: Profiler):
+    with profiler.phase("day_09_parse"):
+        disk = Disk.from_file(filename, free_index=free_index)
     if output:
         disk.to_file("d9_initial.txt")
-    q1_disk = disk.compress()
-    q1 = q1_disk.checksum()
+    with profiler.phase("day_09_part_1"):
+        if stream:
+            q1 = compress_checksum_file(filename)
+        else:
+            q1_disk = disk.compress()
+            q1 = q1_disk.checksum()
     print(f"Q1: checksum after fragmentation is {q1}")
     if output:
         q1_disk.to_file("d9_q1.txt")
-    q2_disk = disk.defragment()
-    q2 = q2_disk.checksum()
+    with profiler.phase("day_09_part_2"):
+        q2_disk = disk.defragment()
+        q2 = q2_disk.checksum()
     print(f"Q2: checksum after defragmentation is {q2}")
     if output:
         q2_disk.to_file("d9_q2.txt")
+    profiler.report()
 
 
 if __name__ == "__main__":
@@ -244,6 +738,24 @@ if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("--input", type=str, default=str(fd), help="Input file")
     parser.add_argument("--output", action="store_true", help="Output steps")
+    parser.add_argument("--tree", action="store_true", help="Index free spaces in a segment tree")
+    parser.add_argument(
+        "--stream", action="store_true", help="Q1 checksum read from both ends of the disk map, without --output"
+    )
+    add_profile_arguments(parser)
+    add_log_arguments(parser)
+    add_stats_arguments(parser)
     args = parser.parse_args()
-
-    main(args.input, args.output)
+    if args.stream and args.output:
+        parser.error("--output needs the compressed disk, without --stream")
+
+    configure_logging(args.log_level)
+
+    with counting(args.stats):
+        main(
+            args.input,
+            args.output,
+            TreeFreeIndex if args.tree else BucketFreeIndex,
+            args.stream,
+            Profiler.from_args(args),
+        )
@@ -1,8 +1,17 @@
+import random
+from copy import deepcopy
 from pathlib import Path
 
 import pytest
 
-from day_09.compute import Disk
+from day_09.compute import (
+    CompactDisk,
+    Disk,
+    Offset,
+    TreeFreeIndex,
+    compress_checksum,
+    compress_checksum_file,
+)
 
 
 @pytest.fixture(scope="session")
@@ -55,3 +64,136 @@ def test_q2(input_txt):
     assert disk.file_size == input_txt.file_size
     assert disk.free_size == input_txt.free_size
     assert disk.checksum() == 6237075041489
+
+
+@pytest.mark.parametrize("size_gte", [None, 1, 3, 9, 12])
+def test_first_free_space_index(input_txt, size_gte):
+    disk = input_txt.defragment()
+    for left_of in (0, 1000, disk.disk_size // 2, disk.disk_size):
+        assert disk.first_free_space(left_of=left_of, size_gte=size_gte) == disk._scan_free_space(
+            left_of=left_of, size_gte=size_gte
+        )
+
+
+def test_tree_free_index(input_txt):
+    disk = Disk.from_file(Path(__file__).parent.absolute() / "input.txt", free_index=TreeFreeIndex)
+    assert disk.compress().checksum() == 6216544403458
+    assert disk.defragment().checksum() == 6237075041489
+
+
+def test_tree_free_index_large_spans():
+    spans = [3, 2000, 5, 10, 1500, 1, 1200, 0, 20]
+    disk = Disk.from_spans(spans, free_index=TreeFreeIndex)
+    # one slot per span, whatever their sizes
+    assert disk._free_index._leaves <= 2 * len(spans)
+    assert disk.first_free_space(left_of=disk.disk_size, size_gte=1500).offset == 3
+    assert disk.first_free_space(left_of=disk.disk_size, size_gte=11) == disk._scan_free_space(
+        left_of=disk.disk_size, size_gte=11
+    )
+
+    defragmented = disk.defragment()
+    assert defragmented.file_size == disk.file_size
+    assert defragmented.free_size == disk.free_size
+    assert defragmented.checksum() == Disk.from_spans(spans).defragment().checksum()
+
+
+def test_compress_checksum_file(tmp_path):
+    assert compress_checksum_file(Path(__file__).parent.absolute() / "small_ex.txt") == 1928
+    assert compress_checksum_file(Path(__file__).parent.absolute() / "input.txt") == 6216544403458
+    filename = tmp_path / "input.txt"
+    for disk_map in (b"12345\r\n", b"12345"):
+        filename.write_bytes(disk_map)
+        assert compress_checksum_file(filename) == compress_checksum([1, 2, 3, 4, 5])
+    filename.write_bytes(b"")
+    assert compress_checksum_file(filename) == 0
+    # a free space on the right, never read by the checksum
+    for disk_map in (b"x", b"12345x7", b"1\n2"):
+        filename.write_bytes(disk_map)
+        with pytest.raises(ValueError):
+            compress_checksum_file(filename)
+
+
+@pytest.mark.parametrize("disk_map", [b"12 3\n", b"123x", b"12\x003"])
+def test_load_rejects_non_digits(disk_map, tmp_path):
+    filename = tmp_path / "input.txt"
+    filename.write_bytes(disk_map)
+    with pytest.raises(ValueError):
+        Disk.from_file(filename)
+    with pytest.raises(ValueError):
+        CompactDisk.from_file(filename)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compress_checksum_random(seed):
+    rnd = random.Random(seed)
+    spans = [rnd.randint(0, 9) for _ in range(rnd.randint(1, 60))]
+    assert compress_checksum(spans) == Disk.from_spans(spans).compress().checksum()
+
+
+@pytest.mark.parametrize(
+    "filename, q1, q2",
+    [
+        ("small_ex.txt", 1928, 2858),
+        ("input.txt", 6216544403458, 6237075041489),
+    ],
+)
+def test_compact_disk(filename, q1, q2, tmp_path):
+    disk = Disk.from_file(Path(__file__).parent.absolute() / filename)
+    compact = CompactDisk.from_file(Path(__file__).parent.absolute() / filename)
+    assert (compact.file_size, compact.free_size, compact.disk_size) == (disk.file_size, disk.free_size, disk.disk_size)
+    assert compact.checksum() == disk.checksum()
+
+    disk.to_file(tmp_path / "disk.txt")
+    compact.to_file(tmp_path / "compact.txt")
+    assert (tmp_path / "compact.txt").read_text() == (tmp_path / "disk.txt").read_text()
+
+    for compacted, expected in ((compact.compress(), q1), (compact.defragment(), q2)):
+        assert compacted is not compact
+        assert compacted.checksum() == expected
+        assert compacted.file_size == disk.file_size
+        assert compacted.free_size == disk.free_size
+    assert compact.checksum() == disk.checksum()
+
+
+def test_compact_disk_fragmented_layout():
+    compressed = CompactDisk.from_spans([2, 2, 3]).compress()
+    assert list(compressed.file_ids) == [0, 1, 1]
+    assert list(compressed.free_offsets) == [5]
+    with pytest.raises(ValueError):
+        compressed.defragment()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compact_disk_random(seed):
+    rnd = random.Random(seed)
+    # Disk does not merge free spaces after an empty first file
+    spans = [rnd.randint(1, 9)] + [rnd.randint(0, 9) for _ in range(rnd.randint(0, 60))]
+    disk = Disk.from_spans(spans)
+    compact = CompactDisk.from_spans(spans)
+    for compacted, expected in ((compact.compress(), disk.compress()), (compact.defragment(), disk.defragment())):
+        assert compacted.checksum() == expected.checksum()
+        assert list(compacted.file_offsets) == sorted(compacted.file_offsets)
+        assert compacted.free_size + compacted.file_size == compacted.disk_size
+
+
+@pytest.mark.parametrize("offset, size", [(0, 0), (0, 1), (3, 4), (100, 9)])
+def test_offset_checksum(offset, size):
+    assert Offset(offset, size).checksum(7) == sum((i * 7 for i in range(offset, offset + size)))
+
+
+def test_running_checksum(small_ex_txt):
+    disk = deepcopy(small_ex_txt)
+    for file_id in sorted(disk._file_map.keys(), reverse=True):
+        disk._move_to_free_space(file_id)
+        assert disk.checksum() == disk._compute_checksum()
+    assert disk.checksum() == 2858
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_spans_in_offset_order(seed):
+    rnd = random.Random(seed)
+    spans = [rnd.randint(1, 9)] + [rnd.randint(0 if i % 2 else 1, 9) for i in range(1, rnd.randint(2, 60))]
+    disk = Disk.from_spans(spans)
+    for layout in (disk, disk.compress(), disk.defragment()):
+        assert sum((size for _, size in layout.spans())) == layout.disk_size
+        assert sum((size for file_id, size in layout.spans() if file_id is not None)) == layout.file_size